@@ -0,0 +1,26 @@
+import copy
+
+from rest_framework.authentication import TokenAuthentication
+
+from foodgram.cache import ExpiringLRUCache
+
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TTL = 60
+
+# Записи сверяются с версией auth:<id> в общем кеше (CACHES), поэтому
+# выход или смена пароля в одном процессе сбрасывают их во всех.
+token_cache = ExpiringLRUCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            user, token = cached
+            return copy.copy(user), copy.copy(token)
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(
+            key, (copy.copy(user), copy.copy(token)), f'auth:{user.id}'
+        )
+        return user, token
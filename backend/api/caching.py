@@ -0,0 +1,183 @@
+import gzip
+import hashlib
+import threading
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from foodgram.cache import get_versions
+
+RESPONSE_KEY = 'response:{}:{}'
+GZIP_MIN_LENGTH = 1024
+
+# Счётчики попаданий хранятся в памяти процесса, как у ExpiringLRUCache:
+# запись в общий кеш на каждый запрос обходится дороже самого ответа.
+cache_access = defaultdict(lambda: {'hits': 0, 'misses': 0})
+cache_access_lock = threading.Lock()
+
+
+def get_cache_stats(name):
+    with cache_access_lock:
+        stats = dict(cache_access[name])
+
+    requests = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / requests if requests else 0
+    return stats
+
+
+def count_cache_access(name, result):
+    with cache_access_lock:
+        cache_access[name][result] += 1
+
+
+class VersionedCacheMixin:
+    cache_version_names = ()
+    cache_timeout = 60 * 60 * 24
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def is_cacheable(self, request):
+        return request.accepted_renderer.format == 'json'
+
+    def get_cache_state(self):
+        return None
+
+    def get_response_key(self, request):
+        query = sorted(
+            (name, sorted(values))
+            for name, values in request.query_params.lists()
+        )
+        return RESPONSE_KEY.format(
+            self.basename,
+            hashlib.md5(
+                repr(
+                    (
+                        get_versions(*self.cache_version_names),
+                        self.get_cache_state(),
+                        self.action,
+                        sorted(self.kwargs.items()),
+                        query,
+                        request.get_host(),
+                    )
+                ).encode()
+            ).hexdigest(),
+        )
+
+    def get_cached_response(self, render, request, *args, **kwargs):
+        if not self.is_cacheable(request):
+            return render(request, *args, **kwargs)
+
+        key = self.get_response_key(request)
+        entry = cache.get(key)
+        if entry is None:
+            response = render(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            body = JSONRenderer().render(response.data)
+            entry = {
+                'body': body,
+                'gzip': (
+                    gzip.compress(body)
+                    if len(body) >= GZIP_MIN_LENGTH
+                    else None
+                ),
+                'etag': f'"{hashlib.md5(body).hexdigest()}"',
+            }
+            cache.set(key, entry, self.cache_timeout)
+            count_cache_access(self.basename, 'misses')
+            cache_status = 'MISS'
+        else:
+            count_cache_access(self.basename, 'hits')
+            cache_status = 'HIT'
+
+        if entry['etag'] in request.headers.get('If-None-Match', ''):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        elif entry['gzip'] is not None and 'gzip' in request.headers.get(
+            'Accept-Encoding', ''
+        ):
+            response = HttpResponse(
+                entry['gzip'], content_type='application/json'
+            )
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(
+                entry['body'], content_type='application/json'
+            )
+
+        response['ETag'] = entry['etag']
+        response['X-Cache'] = cache_status
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class ConditionalGetMixin:
+    conditional_version_names = ()
+    validation_state = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_validation_state(self):
+        return None
+
+    def get_cache_state(self):
+        return self.validation_state
+
+    def get_conditional_response(self, render, request, *args, **kwargs):
+        validation_state = self.validation_state = self.get_validation_state()
+        if validation_state is None:
+            return render(request, *args, **kwargs)
+
+        version_names = list(self.conditional_version_names)
+        if request.user.is_authenticated:
+            version_names.append(f'user:{request.user.id}')
+        versions = get_versions(*version_names)
+
+        last_modified = int(
+            max(
+                validation_state[0].timestamp(),
+                *(version / 10**9 for version in versions),
+            )
+        )
+        etag = '"{}"'.format(
+            hashlib.md5(
+                repr(
+                    (
+                        validation_state,
+                        versions,
+                        request.user.id,
+                        request.get_full_path(),
+                    )
+                ).encode()
+            ).hexdigest()
+        )
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = render(request, *args, **kwargs)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Authorization',))
+        return response
@@ -1,8 +1,8 @@
 from distutils.util import strtobool
 
 import django_filters
+from django.db.models import Exists, OuterRef
 
-from ingredients.models import Ingredient
 from recipies.models import Recipe
 from tags.models import Tag
 
@@ -12,21 +12,12 @@ BOOL_CHOICE = (
 )
 
 
-class IngredientNameFilter(django_filters.FilterSet):
-    name = django_filters.CharFilter(
-        field_name='name', lookup_expr='istartswith'
-    )
-
-    class Meta:
-        model = Ingredient
-        fields = ['name']
-
-
 class RecipiesFilter(django_filters.FilterSet):
     tags = django_filters.ModelMultipleChoiceFilter(
         field_name='tags__slug',
         to_field_name='slug',
         queryset=Tag.objects.all(),
+        method='filter_tags',
     )
     author = django_filters.NumberFilter(
         field_name='author', lookup_expr='exact'
@@ -42,6 +33,18 @@ class RecipiesFilter(django_filters.FilterSet):
         model = Recipe
         fields = ['author', 'tags']
 
+    def filter_tags(self, queryset, name, tags):
+        if not tags:
+            return queryset
+
+        return queryset.filter(
+            Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe_id=OuterRef('pk'), tag__in=tags
+                )
+            )
+        )
+
     def filter_favorited(self, queryset, name, value):
         if self.request.user.is_anonymous:
             return Recipe.objects.none()
@@ -1,6 +1,48 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+CURSOR_PAGINATION_PARAM = 'pagination'
+CURSOR_PAGINATION_VALUE = 'cursor'
+
+
+class CustomCursorPaginator(CursorPagination):
+    page_size = 5
+    page_size_query_param = 'limit'
+    ordering = ('-pub_date', '-id')
+
+
+class UserCursorPaginator(CustomCursorPaginator):
+    ordering = ('id',)
 
 
 class CustomPNPaginator(PageNumberPagination):
     page_size = 5
     page_size_query_param = 'limit'
+    cursor_paginator_class = None
+    cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (
+            self.cursor_paginator_class is not None
+            and request.query_params.get(CURSOR_PAGINATION_PARAM)
+            == CURSOR_PAGINATION_VALUE
+        ):
+            self.cursor_paginator = self.cursor_paginator_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+
+        return super().get_paginated_response(data)
+
+
+class RecipePaginator(CustomPNPaginator):
+    cursor_paginator_class = CustomCursorPaginator
+
+
+class UserPaginator(CustomPNPaginator):
+    cursor_paginator_class = UserCursorPaginator
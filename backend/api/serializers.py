@@ -1,19 +1,40 @@
 import base64
+import json
+from collections import defaultdict
 
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.core.files.base import ContentFile
+from django.core.validators import validate_image_file_extension
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import QueryDict
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from rest_framework.validators import (
     UniqueTogetherValidator,
     UniqueValidator,
     ValidationError,
 )
 
+from foodgram.cache import VersionedLRUCache, get_versions
 from ingredients.models import Ingredient
-from recipies.models import Favorite, IngredientAmount, Recipe, ShoppingCart
+from recipies.images import get_image_srcset, is_image
+from recipies.models import (
+    Favorite,
+    IngredientAmount,
+    Recipe,
+    ShoppingCart,
+    ShoppingListItem,
+    delete_batch,
+)
 from tags.models import Tag
 from users.models import FoodGramUser, Subscribe
 
+RECIPE_CACHE_SIZE = 1000
+BULK_RECIPES_LIMIT = 100
+
+recipe_cache = VersionedLRUCache(RECIPE_CACHE_SIZE)
+
 
 class FoodGramUserSerializer(serializers.ModelSerializer):
     username = serializers.CharField(
@@ -54,12 +75,20 @@ class FoodGramUserSerializer(serializers.ModelSerializer):
         return (
             request is not None
             and not request.user.is_anonymous
-            and Subscribe.objects.filter(
-                user=request.user,
-                author=obj,
-            ).exists()
+            and obj.id in self._get_subscribed_authors(request)
         )
 
+    @staticmethod
+    def _get_subscribed_authors(request):
+        if not hasattr(request, 'subscribed_authors'):
+            request.subscribed_authors = set(
+                Subscribe.objects.filter(user=request.user).values_list(
+                    'author_id', flat=True
+                )
+            )
+
+        return request.subscribed_authors
+
 
 class SetPasswordSerializer(serializers.Serializer):
     current_password = serializers.CharField(required=True)
@@ -111,6 +140,18 @@ class IngredientAmountSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
+class ShoppingListItemSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='ingredient.id')
+    name = serializers.CharField(source='ingredient.name')
+    measurement_unit = serializers.CharField(
+        source='ingredient.measurement_unit'
+    )
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+
+
 class IngredientAmoutCreateSerializer(serializers.Serializer):
     id = serializers.IntegerField()
     amount = serializers.IntegerField(min_value=1)
@@ -120,34 +161,47 @@ class IngredientAmoutCreateSerializer(serializers.Serializer):
         fields = ('id', 'amount')
 
 
-class RecipeShortSerializer(serializers.ModelSerializer):
+class RecipeImageMixin(serializers.Serializer):
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
+    image_srcset_webp = serializers.SerializerMethodField()
 
+    def get_image(self, obj):
+        return obj.image.url
+
+    def get_image_srcset(self, obj):
+        return get_image_srcset(obj.image, obj.image_variants, 'jpeg')
+
+    def get_image_srcset_webp(self, obj):
+        return get_image_srcset(obj.image, obj.image_variants, 'webp')
+
+
+class RecipeShortSerializer(RecipeImageMixin, serializers.ModelSerializer):
     class Meta:
         model = Recipe
         fields = (
             'id',
             'name',
             'image',
+            'image_srcset',
+            'image_srcset_webp',
             'cooking_time',
         )
         read_only_fields = (
             'id',
             'name',
             'image',
+            'image_srcset',
+            'image_srcset_webp',
             'cooking_time',
         )
 
-    def get_image(self, obj):
-        return obj.image.url
-
 
-class RecipeViewSerializer(serializers.ModelSerializer):
+class RecipeViewSerializer(RecipeImageMixin, serializers.ModelSerializer):
     tags = TagSerializer(read_only=True, many=True)
     ingredients = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
-    image = serializers.SerializerMethodField()
     author = FoodGramUserSerializer()
 
     class Meta:
@@ -158,17 +212,59 @@ class RecipeViewSerializer(serializers.ModelSerializer):
             'author',
             'text',
             'image',
+            'image_srcset',
+            'image_srcset_webp',
+            'image_status',
             'cooking_time',
             'tags',
             'ingredients',
             'is_favorited',
             'is_in_shopping_cart',
+            'favorites_count',
+            'shopping_cart_count',
         )
 
-    def get_image(self, obj):
-        return obj.image.url
+    def to_representation(self, instance):
+        request = self.context.get('request')
+        if request is None:
+            return super().to_representation(instance)
+
+        if not hasattr(request, 'recipe_versions'):
+            request.recipe_versions = tuple(
+                get_versions('tags', 'ingredients', 'users')
+            )
+        version = (instance.updated_at, request.recipe_versions)
+        shared_data = recipe_cache.get(instance.id, version)
+        if shared_data is None:
+            shared_data = super().to_representation(instance)
+            recipe_cache.set(instance.id, version, shared_data)
+            flags = (
+                shared_data['is_favorited'],
+                shared_data['is_in_shopping_cart'],
+            )
+        else:
+            flags = (
+                self.get_is_favorited(instance),
+                self.get_is_in_shopping_cart(instance),
+            )
+
+        data = {**shared_data, 'author': {**shared_data['author']}}
+        data['author']['is_subscribed'] = (
+            not request.user.is_anonymous
+            and instance.author_id
+            in FoodGramUserSerializer._get_subscribed_authors(request)
+        )
+        data['is_favorited'], data['is_in_shopping_cart'] = flags
+        # Счётчики не меняют updated_at, поэтому берём их из модели,
+        # а не из кеша.
+        data['favorites_count'] = instance.favorites_count
+        data['shopping_cart_count'] = instance.shopping_cart_count
+        return data
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+
         request = self.context.get('request')
         return (
             request is not None
@@ -180,6 +276,9 @@ class RecipeViewSerializer(serializers.ModelSerializer):
         )
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+
         request = self.context.get('request')
         return (
             request is not None
@@ -191,24 +290,29 @@ class RecipeViewSerializer(serializers.ModelSerializer):
         )
 
     def get_ingredients(self, obj):
-        ingredients_amount = IngredientAmount.objects.filter(
-            recipe=obj,
-        )
         serializer = IngredientAmountSerializer(
-            ingredients_amount,
+            obj.ingredient_amounts.all(),
             many=True,
         )
         return serializer.data
 
 
-class Base64ImageField(serializers.ImageField):
+class Base64ImageField(serializers.FileField):
+    default_validators = [validate_image_file_extension]
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
             format, imgstr = data.split(';base64,')
             ext = format.split('/')[-1]
             data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
 
-        return super().to_internal_value(data)
+        file = super().to_internal_value(data)
+        # Image.open читает только заголовок, полная проверка и
+        # обработка выполняются в processimages.
+        if not is_image(file):
+            raise ValidationError('Загруженный файл не является изображением')
+
+        return file
 
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
@@ -229,66 +333,143 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             'ingredients',
         )
 
-    def validate_tags(self, tags):
-        if Tag.objects.filter(id__in=tags).count() != len(tags):
+    def to_internal_value(self, data):
+        if isinstance(data, QueryDict):
+            data = self._parse_multipart(data)
+
+        return super().to_internal_value(data)
+
+    @staticmethod
+    def _parse_multipart(data):
+        parsed = data.dict()
+        try:
+            if 'tags' in data:
+                tags = data.getlist('tags')
+                parsed['tags'] = (
+                    json.loads(tags[0])
+                    if len(tags) == 1 and tags[0].startswith('[')
+                    else tags
+                )
+            if 'ingredients' in data:
+                parsed['ingredients'] = json.loads(data['ingredients'])
+        except ValueError:
+            raise ValidationError(
+                {'non_field_error': 'Теги и ингредиенты передаются в JSON'}
+            )
+
+        return parsed
+
+    def validate_tags(self, tags_ids):
+        tags = list(Tag.objects.filter(id__in=tags_ids))
+        if len(tags) != len(tags_ids):
             raise ValidationError(
                 {'tags': 'Заданы отсутствующие теги'},
             )
 
         return tags
 
-    def validate_ingredients(self, ingredients):
-        ingredients_id = [data['id'] for data in ingredients]
-        if Ingredient.objects.filter(
-            id__in=ingredients_id,
-        ).count() != len(ingredients):
+    def validate_ingredients(self, ingredients_data):
+        ingredients_ids = [data['id'] for data in ingredients_data]
+        if len(set(ingredients_ids)) != len(ingredients_ids):
+            raise ValidationError(
+                {'ingredients': 'Ингредиенты не должны повторяться'}
+            )
+
+        ingredients = Ingredient.objects.in_bulk(ingredients_ids)
+        if len(ingredients) != len(ingredients_ids):
             raise ValidationError(
                 {'ingredients': 'Заданы отсутствующие ингредиенты'}
             )
 
-        return ingredients
+        return [
+            {
+                'ingredient': ingredients[data['id']],
+                'amount': data['amount'],
+            }
+            for data in ingredients_data
+        ]
 
-    def _set_tags_and_ingredients(self, instance, tags_data, ingredients_data):
-        tags = Tag.objects.filter(id__in=tags_data)
-        instance.tags.set(tags)
+    def create(self, validated_data):
+        tags = validated_data.pop('tags')
+        ingredients_data = validated_data.pop('ingredients')
 
-        ingredients = []
-        for ingredient_data in ingredients_data:
-            ingredient = Ingredient.objects.get(id=ingredient_data['id'])
-            ingredients.append(
-                IngredientAmount(
-                    recipe=instance,
-                    ingredient=ingredient,
-                    amount=ingredient_data['amount'],
-                )
+        with transaction.atomic():
+            recipe = Recipe.objects.create(
+                author=self.context.get('request').user,
+                **validated_data,
+            )
+            recipe.tags.add(*tags)
+            IngredientAmount.objects.bulk_create(
+                IngredientAmount(recipe=recipe, **ingredient_data)
+                for ingredient_data in ingredients_data
             )
-        IngredientAmount.objects.bulk_create(ingredients)
 
-    def create(self, validated_data):
-        tags_data = validated_data.pop('tags')
-        ingredients_data = validated_data.pop('ingredients')
+        return recipe
 
-        recipe = Recipe.objects.create(
-            author=self.context.get('request').user,
-            **validated_data,
-        )
+    @staticmethod
+    def _update_ingredients(instance, ingredients_data):
+        new_amounts = {
+            ingredient_data['ingredient'].id: ingredient_data['amount']
+            for ingredient_data in ingredients_data
+        }
 
-        self._set_tags_and_ingredients(recipe, tags_data, ingredients_data)
+        old_amounts = defaultdict(int)
+        current = {}
+        deleted = []
+        for ingredient_amount in instance.ingredient_amounts.all():
+            ingredient_id = ingredient_amount.ingredient_id
+            old_amounts[ingredient_id] += ingredient_amount.amount
+            if ingredient_id in current or ingredient_id not in new_amounts:
+                deleted.append(ingredient_amount.pk)
+            else:
+                current[ingredient_id] = ingredient_amount
+
+        changed = []
+        for ingredient_id, ingredient_amount in current.items():
+            if ingredient_amount.amount != new_amounts[ingredient_id]:
+                ingredient_amount.amount = new_amounts[ingredient_id]
+                changed.append(ingredient_amount)
+
+        if deleted:
+            # Список покупок меняется ниже одним вызовом.
+            delete_batch(IngredientAmount.objects.filter(pk__in=deleted))
+        IngredientAmount.objects.bulk_update(changed, ('amount',))
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(recipe=instance, **ingredient_data)
+            for ingredient_data in ingredients_data
+            if ingredient_data['ingredient'].id not in current
+        )
 
-        return recipe
+        ShoppingListItem.objects.change_amounts(
+            instance.shopping_cart.values_list('user_id', flat=True),
+            {
+                ingredient_id: new_amounts.get(ingredient_id, 0)
+                - old_amounts.get(ingredient_id, 0)
+                for ingredient_id in old_amounts.keys() | new_amounts
+            },
+        )
 
     def update(self, instance, validated_data):
-        tags_data = validated_data.pop('tags')
-        ingredients_data = validated_data.pop('ingredients')
-
-        instance.tags.clear()
-        instance.ingredients.clear()
+        tags = validated_data.pop('tags', None)
+        ingredients_data = validated_data.pop('ingredients', None)
 
-        self._set_tags_and_ingredients(instance, tags_data, ingredients_data)
+        with transaction.atomic():
+            if tags is not None:
+                instance.tags.set(tags)
+            if ingredients_data is not None:
+                self._update_ingredients(instance, ingredients_data)
 
-        return super().update(instance, validated_data)
+            return super().update(instance, validated_data)
 
     def to_representation(self, instance):
+        prefetch_related_objects(
+            [instance],
+            'tags',
+            Prefetch(
+                'ingredient_amounts',
+                IngredientAmount.objects.select_related('ingredient'),
+            ),
+        )
         serializer = RecipeViewSerializer(
             instance,
             context={'request': self.context.get('request')},
@@ -297,9 +478,6 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
 
 
 class SubscribeSerializer(FoodGramUserSerializer):
-    recipes_count = serializers.SerializerMethodField(
-        method_name='get_recipes_count',
-    )
     recipes = serializers.SerializerMethodField(
         method_name='get_recipes',
     )
@@ -314,6 +492,7 @@ class SubscribeSerializer(FoodGramUserSerializer):
             'last_name',
             'is_subscribed',
             'recipes_count',
+            'subscribers_count',
             'recipes',
         )
         read_only_fields = (
@@ -324,19 +503,19 @@ class SubscribeSerializer(FoodGramUserSerializer):
             'last_name',
             'is_subscribed',
             'recipes_count',
+            'subscribers_count',
             'recipes',
         )
 
-    def get_recipes_count(self, obj):
-        return obj.recipies.count()
-
     def get_recipes(self, obj):
         request = self.context.get('request')
         if request is None:
             return []
 
         recipes_limit = request.GET.get('recipes_limit', None)
-        if recipes_limit is None:
+        if hasattr(obj, 'latest_recipes'):
+            user_recipies = obj.latest_recipes
+        elif recipes_limit is None:
             user_recipies = obj.recipies.all()
         else:
             user_recipies = obj.recipies.all()[: int(recipes_limit)]
@@ -350,17 +529,42 @@ class SubscribeSerializer(FoodGramUserSerializer):
         return serialiser.data
 
 
-class SubscribeCreateSerializer(serializers.ModelSerializer):
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_RECIPES_LIMIT,
+    )
+
+    def validate_recipes(self, recipes):
+        if len(set(recipes)) != len(recipes):
+            raise ValidationError('Рецепты не должны повторяться')
+
+        return recipes
+
+
+class UniqueRelationCreateMixin:
+    exists_message = None
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [self.exists_message]}
+            )
+
+
+class SubscribeCreateSerializer(
+    UniqueRelationCreateMixin, serializers.ModelSerializer
+):
+    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    exists_message = 'На этого автора уже подписаны'
+
     class Meta:
         model = Subscribe
         fields = ['user', 'author']
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Subscribe.objects.all(),
-                fields=['user', 'author'],
-                message='На этого автора уже подписаны',
-            )
-        ]
 
     def validate(self, attrs):
         if attrs['user'] == attrs['author']:
@@ -370,24 +574,23 @@ class SubscribeCreateSerializer(serializers.ModelSerializer):
         return super().validate(attrs)
 
     def to_representation(self, instance):
+        instance.author.refresh_from_db(fields=('subscribers_count',))
         serializer = SubscribeSerializer(
-            instance.user,
-            context={'request': self.context.get('request')},
+            instance.author,
+            context=self.context,
         )
         return serializer.data
 
 
-class FavoriteAddSerializer(serializers.ModelSerializer):
+class FavoriteAddSerializer(
+    UniqueRelationCreateMixin, serializers.ModelSerializer
+):
+    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    exists_message = 'Этот рецепт уже в избранном'
+
     class Meta:
         model = Favorite
         fields = ['user', 'recipe']
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Favorite.objects.all(),
-                fields=['user', 'recipe'],
-                message='Этот рецепт уже в избранном',
-            )
-        ]
 
     def to_representation(self, instance):
         serializer = RecipeShortSerializer(
@@ -397,17 +600,15 @@ class FavoriteAddSerializer(serializers.ModelSerializer):
         return serializer.data
 
 
-class ShoppingCartAddSerializer(serializers.ModelSerializer):
+class ShoppingCartAddSerializer(
+    UniqueRelationCreateMixin, serializers.ModelSerializer
+):
+    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    exists_message = 'Этот рецепт уже в корзине'
+
     class Meta:
         model = ShoppingCart
         fields = ['user', 'recipe']
-        validators = [
-            UniqueTogetherValidator(
-                queryset=ShoppingCart.objects.all(),
-                fields=['user', 'recipe'],
-                message='Этот рецепт уже в корзине',
-            )
-        ]
 
     def to_representation(self, instance):
         serializer = RecipeShortSerializer(
@@ -0,0 +1,32 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.caching import cache_access
+from users.models import FoodGramUser
+
+
+@override_settings(
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    }
+)
+class ResponseCacheStatsTest(TestCase):
+    def setUp(self):
+        cache_access.clear()
+        self.client = APIClient()
+
+    def test_hits_and_misses_counted(self):
+        for cache_status in ('MISS', 'HIT', 'HIT'):
+            response = self.client.get('/api/recipes/')
+            self.assertEqual(response['X-Cache'], cache_status)
+
+        self.client.force_authenticate(
+            FoodGramUser.objects.create(
+                username='admin', email='admin@example.com', is_staff=True
+            )
+        )
+        response = self.client.get('/api/recipes/cache_stats/')
+
+        self.assertEqual(
+            response.json(), {'hits': 2, 'misses': 1, 'hit_rate': 2 / 3}
+        )
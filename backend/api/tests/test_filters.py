@@ -0,0 +1,86 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.filters import RecipiesFilter
+from recipies.models import Recipe
+from tags.models import Tag
+from users.models import FoodGramUser
+
+
+@override_settings(
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    }
+)
+class RecipeTagsFilterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = FoodGramUser.objects.create(
+            username='author', email='author@example.com'
+        )
+        cls.tags = [
+            Tag.objects.create(
+                name=f'tag{number}',
+                color=f'#00000{number}',
+                slug=f'tag{number}',
+            )
+            for number in range(3)
+        ]
+        cls.recipes = []
+        for number, tags in enumerate(
+            (cls.tags[:2], cls.tags[:3], cls.tags[1:2], cls.tags[2:])
+        ):
+            recipe = Recipe.objects.create(
+                author=author,
+                name=f'recipe{number}',
+                text='text',
+                cooking_time=1,
+                image='recipies_img/recipe.jpg',
+            )
+            recipe.tags.set(tags)
+            cls.recipes.append(recipe)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_recipe_with_several_tags_listed_once(self):
+        response = self.client.get(
+            '/api/recipes/', {'tags': ['tag0', 'tag1'], 'limit': 10}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        ids = [recipe['id'] for recipe in response.json()['results']]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertCountEqual(ids, [recipe.id for recipe in self.recipes[:3]])
+        self.assertEqual(response.json()['count'], len(ids))
+
+    def test_unknown_tag_rejected(self):
+        response = self.client.get('/api/recipes/', {'tags': 'unknown'})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_tags_filter_does_not_need_distinct(self):
+        queryset = RecipiesFilter(
+            {'tags': ['tag0', 'tag1']}, queryset=Recipe.objects.all()
+        ).qs
+
+        self.assertFalse(queryset.query.distinct)
+        self.assertEqual(queryset.count(), 3)
+
+    def test_tags_filter_uses_unique_index(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('EXPLAIN output is checked for PostgreSQL only')
+
+        queryset = RecipiesFilter(
+            {'tags': ['tag0', 'tag1']}, queryset=Recipe.objects.all()
+        ).qs
+        with connection.cursor() as cursor:
+            # На нескольких строках планировщик выбирает seq scan,
+            # проверяем, что индекс вообще применим к подзапросу.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+
+        self.assertIn(
+            f'{Recipe.tags.through._meta.db_table}_recipe_id_tag_id', plan
+        )
@@ -1,26 +1,51 @@
-from django.http import HttpResponse
+from django.db.models import (
+    Count,
+    Exists,
+    F,
+    Max,
+    OuterRef,
+    Prefetch,
+    Window,
+)
+from django.db.models.functions import Greatest, RowNumber
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from api.filters import IngredientNameFilter, RecipiesFilter
-from api.paginators import CustomPNPaginator
+from api.authentication import token_cache
+from api.caching import (
+    ConditionalGetMixin,
+    VersionedCacheMixin,
+    get_cache_stats,
+)
+from api.filters import RecipiesFilter
+from api.paginators import RecipePaginator, UserPaginator
 from api.permissions import IsAuthenticatedAuthorOrReadOnly
 from api.serializers import (
     FavoriteAddSerializer,
     FoodGramUserSerializer,
     IngredientSerializer,
     RecipeCreateSerializer,
+    RecipeIdsSerializer,
     RecipeViewSerializer,
     SetPasswordSerializer,
     ShoppingCartAddSerializer,
+    ShoppingListItemSerializer,
     SubscribeCreateSerializer,
     SubscribeSerializer,
     TagSerializer,
 )
+from ingredients.index import SEARCH_LIMIT, ingredient_index
 from ingredients.models import Ingredient
-from recipies.models import IngredientAmount, Recipe
+from recipies.models import (
+    Favorite,
+    ImageStatus,
+    IngredientAmount,
+    Recipe,
+    ShoppingCart,
+)
 from tags.models import Tag
 from users.models import FoodGramUser
 
@@ -33,14 +58,14 @@ class UserViewSet(
 ):
     queryset = FoodGramUser.objects.all()
     serializer_class = FoodGramUserSerializer
-    pagination_class = CustomPNPaginator
+    pagination_class = UserPaginator
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
         user.set_password(request.data['password'])
-        user.save()
+        user.save(update_fields=('password',))
         headers = self.get_success_headers(serializer.data)
         return Response(
             serializer.data, status=status.HTTP_201_CREATED, headers=headers
@@ -71,9 +96,16 @@ class UserViewSet(
         serializer.is_valid(raise_exception=True)
 
         request.user.set_password(request.data['new_password'])
-        request.user.save()
+        request.user.save(update_fields=('password',))
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(
+        detail=False,
+        permission_classes=(permissions.IsAdminUser,),
+    )
+    def auth_cache_stats(self, request):
+        return Response(token_cache.get_stats(), status=status.HTTP_200_OK)
+
     @action(
         detail=False,
         methods=['get'],
@@ -82,6 +114,10 @@ class UserViewSet(
     def subscriptions(self, request):
         authors = FoodGramUser.objects.filter(subscribed__user=request.user)
         paginate_authors_queryset = self.paginate_queryset(authors)
+        self._set_latest_recipes(
+            paginate_authors_queryset,
+            request.query_params.get('recipes_limit'),
+        )
         serializer = SubscribeSerializer(
             paginate_authors_queryset,
             context=self.get_serializer_context(),
@@ -90,6 +126,25 @@ class UserViewSet(
 
         return self.get_paginated_response(serializer.data)
 
+    @staticmethod
+    def _set_latest_recipes(authors, recipes_limit):
+        recipes = Recipe.objects.filter(author__in=authors).annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=F('author'),
+                order_by=(F('pub_date').desc(), F('id').desc()),
+            )
+        )
+        if recipes_limit is not None:
+            recipes = recipes.filter(row_number__lte=int(recipes_limit))
+
+        latest_recipes = {author.id: [] for author in authors}
+        for recipe in recipes.order_by('author', 'row_number'):
+            latest_recipes[recipe.author_id].append(recipe)
+
+        for author in authors:
+            author.latest_recipes = latest_recipes[author.id]
+
     @action(
         detail=True,
         methods=['post', 'delete'],
@@ -98,10 +153,8 @@ class UserViewSet(
     def subscribe(self, request, pk):
         if request.method == 'POST':
             serializer = SubscribeCreateSerializer(
-                data={
-                    'user': request.user.id,
-                    'author': pk,
-                }
+                data={'author': pk},
+                context=self.get_serializer_context(),
             )
             serializer.is_valid(raise_exception=True)
             serializer.save()
@@ -109,39 +162,103 @@ class UserViewSet(
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         if request.method == 'DELETE':
-            if not request.user.subscriber.filter(author_id=pk).exists():
+            deleted, _ = request.user.subscriber.filter(author_id=pk).delete()
+            if not deleted:
                 return Response(
                     {'error': 'Подписки нет'},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            request.user.subscriber.filter(author_id=pk).delete()
-
             return Response(status=status.HTTP_204_NO_CONTENT)
 
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(VersionedCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (permissions.AllowAny,)
+    cache_version_names = ('tags',)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(VersionedCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (permissions.AllowAny,)
-    filter_backends = (DjangoFilterBackend,)
-    filterset_class = IngredientNameFilter
+    cache_version_names = ('ingredients',)
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(self.search, request, *args, **kwargs)
+
+    def search(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if not name:
+            return Response(ingredient_index.all(), status=status.HTTP_200_OK)
 
+        try:
+            limit = int(request.query_params.get('limit', SEARCH_LIMIT))
+        except ValueError:
+            limit = SEARCH_LIMIT
 
-class RecipeViewSet(viewsets.ModelViewSet):
+        return Response(
+            ingredient_index.search(name, limit), status=status.HTTP_200_OK
+        )
+
+
+class RecipeViewSet(
+    ConditionalGetMixin, VersionedCacheMixin, viewsets.ModelViewSet
+):
     queryset = Recipe.objects.all()
     permission_classes = (IsAuthenticatedAuthorOrReadOnly,)
-    pagination_class = CustomPNPaginator
+    pagination_class = RecipePaginator
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipiesFilter
+    conditional_version_names = ('recipes', 'tags', 'ingredients', 'users')
+    cache_version_names = conditional_version_names
+    cache_timeout = 60 * 60
+
+    def is_cacheable(self, request):
+        return super().is_cacheable(request) and request.user.is_anonymous
+
+    def get_validation_state(self):
+        queryset = self.filter_queryset(Recipe.objects.all())
+        if self.action == 'retrieve':
+            queryset = queryset.filter(pk=self.kwargs['pk'])
+
+        state = queryset.aggregate(
+            last_modified=Max(Greatest('updated_at', 'counters_updated_at')),
+            total=Count('id'),
+        )
+        if state['last_modified'] is None:
+            return None
+
+        return state['last_modified'], state['total']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.select_related('author').prefetch_related(
+                Prefetch('tags', queryset=Tag.objects.all()),
+                Prefetch(
+                    'ingredient_amounts',
+                    queryset=IngredientAmount.objects.select_related(
+                        'ingredient'
+                    ),
+                ),
+            )
+
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset
+
+        return queryset.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+        )
 
     def get_serializer_class(self):
         if self.action in ('create', 'partial_update'):
@@ -157,10 +274,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def favorite(self, request, pk):
         if request.method == 'POST':
             serializer = FavoriteAddSerializer(
-                data={
-                    'user': request.user.id,
-                    'recipe': pk,
-                }
+                data={'recipe': pk},
+                context=self.get_serializer_context(),
             )
             serializer.is_valid(raise_exception=True)
             serializer.save()
@@ -168,12 +283,12 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         if request.method == 'DELETE':
-            if not request.user.favorites.filter(recipe_id=pk).exists():
+            deleted, _ = request.user.favorites.filter(recipe_id=pk).delete()
+            if not deleted:
                 return Response(
                     {'error': 'Рецепта нет в избранном'},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            request.user.favorites.filter(recipe_id=pk).delete()
 
             return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -187,10 +302,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def shopping_cart(self, request, pk):
         if request.method == 'POST':
             serializer = ShoppingCartAddSerializer(
-                data={
-                    'user': request.user.id,
-                    'recipe': pk,
-                }
+                data={'recipe': pk},
+                context=self.get_serializer_context(),
             )
             serializer.is_valid(raise_exception=True)
             serializer.save()
@@ -198,53 +311,124 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         if request.method == 'DELETE':
-            if not request.user.shopping_cart.filter(recipe_id=pk).exists():
+            deleted, _ = request.user.shopping_cart.filter(
+                recipe_id=pk
+            ).delete()
+            if not deleted:
                 return Response(
                     {'error': 'Рецепта нет в корзине'},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            request.user.shopping_cart.filter(recipe_id=pk).delete()
 
             return Response(status=status.HTTP_204_NO_CONTENT)
 
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='favorite/bulk',
+        permission_classes=(permissions.IsAuthenticated,),
+    )
+    def bulk_favorite(self, request):
+        return self._change_user_recipes(Favorite.objects, request)
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='shopping_cart/bulk',
+        permission_classes=(permissions.IsAuthenticated,),
+    )
+    def bulk_shopping_cart(self, request):
+        return self._change_user_recipes(ShoppingCart.objects, request)
+
+    @staticmethod
+    def _change_user_recipes(manager, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+
+        if request.method == 'POST':
+            found, added = manager.add_recipes(request.user, recipe_ids)
+            results = [
+                {
+                    'id': recipe_id,
+                    'status': (
+                        'added'
+                        if recipe_id in added
+                        else 'exists'
+                        if recipe_id in found
+                        else 'not_found'
+                    ),
+                }
+                for recipe_id in recipe_ids
+            ]
+        else:
+            removed = manager.remove_recipes(request.user, recipe_ids)
+            results = [
+                {
+                    'id': recipe_id,
+                    'status': 'removed' if recipe_id in removed else 'missing',
+                }
+                for recipe_id in recipe_ids
+            ]
+
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        permission_classes=(permissions.IsAdminUser,),
+    )
+    def image_queue(self, request):
+        stats = {status_name: 0 for status_name in ImageStatus.values}
+        stats.update(
+            Recipe.objects.values_list('image_status')
+            .annotate(total=Count('id'))
+            .order_by()
+        )
+        return Response(stats, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        permission_classes=(permissions.IsAdminUser,),
+    )
+    def cache_stats(self, request):
+        return Response(
+            get_cache_stats(self.basename), status=status.HTTP_200_OK
+        )
+
     @action(
         detail=False,
         permission_classes=(permissions.IsAuthenticated,),
     )
     def download_shopping_cart(self, request):
-        shopping_cart_recipes_id = (
-            request.user.shopping_cart.all().values_list(
-                'recipe__id', flat=True
-            )
+        ingredients = request.user.shopping_list.values(
+            'amount', 'ingredient__name', 'ingredient__measurement_unit'
+        ).order_by('ingredient__name', 'ingredient__measurement_unit')
+        shopping_cart_file = (
+            f'{ingredient["ingredient__name"]}\t'
+            f'{ingredient["amount"]} '
+            f'{ingredient["ingredient__measurement_unit"]}\n'
+            for ingredient in ingredients.iterator()
         )
-        ingredients_list = IngredientAmount.objects.filter(
-            recipe_id__in=shopping_cart_recipes_id
-        ).values('ingredient__name', 'ingredient__measurement_unit', 'amount')
-
-        shopping_cart = {}
-        for ingredient in ingredients_list:
-            if ingredient['ingredient__name'] in shopping_cart:
-                shopping_cart[ingredient['ingredient__name']][0] += ingredient[
-                    'amount'
-                ]
-            else:
-                shopping_cart[ingredient['ingredient__name']] = [
-                    ingredient['amount'],
-                    ingredient['ingredient__measurement_unit'],
-                ]
-
-        shopping_cart_file = ''
-        for name, data in shopping_cart.items():
-            shopping_cart_file = (
-                shopping_cart_file + f'{name}\t{data[0]} {data[1]}\n'
-            )
 
-        response = HttpResponse(
+        response = StreamingHttpResponse(
             shopping_cart_file, status=200, content_type='text/plain'
         )
         response[
             'Content-Disposition'
         ] = f'attachment; filename="{request.user.username}shopping_cart.txt"'
         return response
+
+    @action(
+        detail=False,
+        permission_classes=(permissions.IsAuthenticated,),
+    )
+    def shopping_list(self, request):
+        serializer = ShoppingListItemSerializer(
+            request.user.shopping_list.select_related('ingredient').order_by(
+                'ingredient__name', 'ingredient__measurement_unit'
+            ),
+            many=True,
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+VERSION_KEY = 'version:{}'
+
+
+def get_version(name):
+    return get_versions(name)[0]
+
+
+def get_versions(*names):
+    keys = [VERSION_KEY.format(name) for name in names]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+
+    return [versions[key] for key in keys]
+
+
+def bump_version(name):
+    cache.set(VERSION_KEY.format(name), time.time_ns(), None)
+
+
+class VersionedLRUCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ExpiringLRUCache:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None:
+            expires, version_name, version, value = entry
+            if expires > time.monotonic() and (
+                get_version(version_name) == version
+            ):
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                    self.hits += 1
+                return value
+
+        with self._lock:
+            if entry is not None and self._entries.get(key) is entry:
+                del self._entries[key]
+            self.misses += 1
+        return None
+
+    def set(self, key, value, version_name):
+        entry = (
+            time.monotonic() + self.ttl,
+            version_name,
+            get_version(version_name),
+            value,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+            }
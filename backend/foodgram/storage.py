@@ -0,0 +1,52 @@
+import hashlib
+import mimetypes
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+from django.utils.deconstruct import deconstructible
+
+
+class ContentExistsError(FileExistsError):
+    pass
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    hash_name = 'sha256'
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        name = self.get_content_name(name, content)
+        try:
+            return super().save(name, content, max_length)
+        except ContentExistsError:
+            return name
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым: существующий файл с таким именем,
+        # в том числе записанный параллельной загрузкой, уже совпадает
+        # с сохраняемым, поэтому суффикс не подбираем.
+        validate_file_name(name, allow_relative_path=True)
+        if self.exists(name):
+            raise ContentExistsError(name)
+
+        return name
+
+    def get_content_name(self, name, content):
+        content_hash = hashlib.new(self.hash_name)
+        for chunk in content.chunks():
+            content_hash.update(chunk)
+        content.seek(0)
+
+        dir_name, file_name = os.path.split(name)
+        content_type, _ = mimetypes.guess_type(file_name)
+        extension = (
+            content_type and mimetypes.guess_extension(content_type)
+        ) or os.path.splitext(file_name)[1].lower()
+        return os.path.join(dir_name, content_hash.hexdigest() + extension)
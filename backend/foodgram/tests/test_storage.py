@@ -0,0 +1,39 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+from foodgram.storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = ContentAddressedStorage(location=directory.name)
+
+    def test_same_content_saved_once(self):
+        first = self.storage.save('images/a.jpeg', ContentFile(b'photo'))
+        second = self.storage.save('images/b.jpg', ContentFile(b'photo'))
+
+        self.assertEqual(first, second)
+        self.assertTrue(first.endswith('.jpg'))
+        self.assertEqual(
+            self.storage.listdir('images')[1], [os.path.basename(first)]
+        )
+
+    def test_concurrent_write_keeps_name(self):
+        name = self.storage.save('images/a.jpg', ContentFile(b'photo'))
+
+        # Параллельная загрузка не увидела файл при первой проверке.
+        with mock.patch.object(
+            self.storage, 'exists', side_effect=[False, True]
+        ):
+            saved = self.storage.save('images/a.jpg', ContentFile(b'photo'))
+
+        self.assertEqual(saved, name)
+        self.assertEqual(
+            os.listdir(self.storage.path('images')), [os.path.basename(name)]
+        )
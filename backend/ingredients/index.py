@@ -0,0 +1,99 @@
+import bisect
+import heapq
+import threading
+import time
+
+from django.db.models import Count
+
+from foodgram.cache import get_version
+
+INDEX_TTL = 300
+VERSION_NAME = 'ingredients'
+SEARCH_LIMIT = 20
+
+
+def _rank(entry):
+    return entry[1], entry[0]
+
+
+class IngredientIndex:
+    def __init__(self, ttl=INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._state = None
+
+    def invalidate(self):
+        self._state = None
+
+    def _build(self, version):
+        from ingredients.models import Ingredient
+
+        entries = [
+            (
+                ingredient.name.casefold(),
+                -ingredient.usage,
+                {
+                    'id': ingredient.id,
+                    'name': ingredient.name,
+                    'measurement_unit': ingredient.measurement_unit,
+                },
+            )
+            for ingredient in Ingredient.objects.annotate(
+                usage=Count('ingredientamount')
+            ).order_by('id')
+        ]
+        all_ingredients = [entry[2] for entry in entries]
+        entries.sort(key=lambda entry: (entry[0], entry[1]))
+        keys = [entry[0] for entry in entries]
+
+        return time.monotonic(), version, keys, entries, all_ingredients
+
+    def _is_fresh(self, state, version):
+        return (
+            state is not None
+            and state[1] == version
+            and time.monotonic() - state[0] <= self.ttl
+        )
+
+    def _get_state(self):
+        # Ингредиенты загружаются и bulk_create без сигналов в других
+        # процессах, поэтому сверяемся с общей версией кеша.
+        version = get_version(VERSION_NAME)
+        state = self._state
+        if self._is_fresh(state, version):
+            return state
+
+        with self._lock:
+            if not self._is_fresh(self._state, version):
+                self._state = self._build(version)
+
+            return self._state
+
+    def all(self):
+        return self._get_state()[4]
+
+    def search(self, name, limit=SEARCH_LIMIT):
+        _, _, keys, entries, _ = self._get_state()
+        name = name.casefold()
+
+        start = bisect.bisect_left(keys, name)
+        end = start
+        while end < len(keys) and keys[end].startswith(name):
+            end += 1
+
+        found = heapq.nsmallest(limit, entries[start:end], key=_rank)
+        if len(found) < limit:
+            found += heapq.nsmallest(
+                limit - len(found),
+                (
+                    entry
+                    for entry in entries
+                    if name in entry[0] and not entry[0].startswith(name)
+                ),
+                key=_rank,
+            )
+
+        return [entry[2] for entry in found]
+
+
+ingredient_index = IngredientIndex()
@@ -1,26 +1,75 @@
 import csv
+import time
+from itertools import islice
 
 from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
 
+from foodgram.cache import bump_version
+from foodgram.utils import iter_json_list
 from ingredients.models import Ingredient
 
 TABLE_NAME = 'ingredients_ingredient'
+BATCH_SIZE = 5000
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if row:
+            yield row[0], row[1]
+
+
+def read_json(file):
+    for item in iter_json_list(file):
+        yield item['name'], item['measurement_unit']
 
 
 class Command(BaseCommand):
-    help = 'Load ingredients list from csv file'
+    help = 'Load ingredients list from csv or json file'
 
     def add_arguments(self, parser: CommandParser):
         parser.add_argument(
-            'args', nargs='+', help='CSV file name', metavar='csv-file-name'
+            'args',
+            nargs='+',
+            help='CSV or JSON file name',
+            metavar='file-name',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Number of ingredients inserted in one transaction',
         )
 
     def handle(self, *args, **options):
         for file in args:
-            with open(file, 'r', encoding='utf-8') as csv_file:
-                reader = csv.reader(csv_file)
-                for row in reader:
-                    Ingredient.objects.get_or_create(
-                        name=row[0], measurement_unit=row[1]
-                    )
-            print(f'The data from the "{file}" has been uploaded successfully')
+            reader = read_json if file.endswith('.json') else read_csv
+            started = time.monotonic()
+            before = Ingredient.objects.count()
+            total = 0
+            seen = set()
+            with open(file, 'r', encoding='utf-8') as data_file:
+                rows = reader(data_file)
+                while batch := list(islice(rows, options['batch_size'])):
+                    total += len(batch)
+                    ingredients = []
+                    for row in batch:
+                        if row in seen:
+                            continue
+                        seen.add(row)
+                        ingredients.append(
+                            Ingredient(name=row[0], measurement_unit=row[1])
+                        )
+                    with transaction.atomic():
+                        Ingredient.objects.bulk_create(
+                            ingredients, ignore_conflicts=True
+                        )
+
+            inserted = Ingredient.objects.count() - before
+            bump_version('ingredients')
+            elapsed = time.monotonic() - started
+            print(
+                f'The data from the "{file}" has been uploaded successfully: '
+                f'{inserted} inserted, {total - inserted} skipped, '
+                f'{total / elapsed if elapsed else total:.0f} rows/s'
+            )
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.1 on 2026-10-18 01:46
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicates(apps, schema_editor):
+    Ingredient = apps.get_model("ingredients", "Ingredient")
+    IngredientAmount = apps.get_model("recipies", "IngredientAmount")
+    ShoppingListItem = apps.get_model("recipies", "ShoppingListItem")
+
+    duplicates = (
+        Ingredient.objects.values("name", "measurement_unit")
+        .annotate(keep_id=Min("id"), total=Count("id"))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for duplicate in duplicates:
+        extra = Ingredient.objects.filter(
+            name=duplicate["name"],
+            measurement_unit=duplicate["measurement_unit"],
+        ).exclude(id=duplicate["keep_id"])
+        IngredientAmount.objects.filter(ingredient__in=extra).update(
+            ingredient_id=duplicate["keep_id"]
+        )
+        for item in ShoppingListItem.objects.filter(ingredient__in=extra):
+            kept, _ = ShoppingListItem.objects.get_or_create(
+                user_id=item.user_id,
+                ingredient_id=duplicate["keep_id"],
+                defaults={"amount": 0},
+            )
+            kept.amount += item.amount
+            kept.save(update_fields=("amount",))
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ingredients", "0001_initial"),
+        ("recipies", "0005_shoppinglistitem"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="ingredient",
+            constraint=models.UniqueConstraint(
+                fields=("name", "measurement_unit"),
+                name="ingredient_name_measurement_unit_unique",
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.test import TestCase, override_settings
+
+from foodgram.cache import bump_version
+from ingredients.index import IngredientIndex
+from ingredients.models import Ingredient
+
+
+@override_settings(
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    }
+)
+class IngredientIndexTest(TestCase):
+    def setUp(self):
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        self.index = IngredientIndex()
+
+    def test_search(self):
+        Ingredient.objects.create(name='морская соль', measurement_unit='г')
+
+        self.assertEqual(
+            [item['name'] for item in self.index.search('сол')],
+            ['соль', 'морская соль'],
+        )
+
+    def test_rebuilt_after_version_bump(self):
+        self.assertEqual(len(self.index.all()), 1)
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in ('сахар', 'перец')
+        )
+        self.assertEqual(len(self.index.all()), 1)
+
+        bump_version('ingredients')
+
+        self.assertEqual(len(self.index.all()), 3)
@@ -1,6 +1,12 @@
 from django.contrib import admin
 
-from recipies.models import Favorite, IngredientAmount, Recipe, ShoppingCart
+from recipies.models import (
+    Favorite,
+    IngredientAmount,
+    Recipe,
+    ShoppingCart,
+    ShoppingListItem,
+)
 from tags.models import Tag
 
 
@@ -28,7 +34,14 @@ class RecipeTagsFilter(admin.SimpleListFilter):
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     inlines = (IngredientAmountInline,)
-    list_display = ('id', 'name', 'cooking_time', 'recipe_tags', 'author')
+    list_display = (
+        'id',
+        'name',
+        'cooking_time',
+        'recipe_tags',
+        'author',
+        'favorites_count',
+    )
     search_fields = ('name', 'author__username')
     list_filter = [RecipeTagsFilter, 'author__username']
     filter_horizontal = ['tags']
@@ -49,3 +62,9 @@ class FavoriteAdmin(admin.ModelAdmin):
 class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'recipe')
     search_fields = ('user',)
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'ingredient', 'amount')
+    search_fields = ('user__username',)
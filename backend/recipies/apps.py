@@ -5,3 +5,6 @@ class RecipiesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipies'
     verbose_name = 'FOODGRAM. Рецепты'
+
+    def ready(self):
+        import recipies.signals  # noqa: F401
@@ -0,0 +1,60 @@
+from django.db import models
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from foodgram.cache import bump_version
+from recipies.models import Favorite, Recipe, ShoppingCart
+from users.models import FoodGramUser, Subscribe
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'shopping_cart_count', ShoppingCart, 'recipe'),
+    (FoodGramUser, 'recipes_count', Recipe, 'author'),
+    (FoodGramUser, 'subscribers_count', Subscribe, 'author'),
+)
+
+
+def change_recipe_counter(recipe_ids, counter, delta):
+    Recipe.objects.filter(pk__in=recipe_ids).update(
+        **{counter: models.F(counter) + delta},
+        counters_updated_at=timezone.now(),
+    )
+
+
+def change_user_counter(user_ids, counter, delta):
+    FoodGramUser.objects.filter(pk__in=user_ids).update(
+        **{counter: models.F(counter) + delta}
+    )
+
+
+def get_actual_count(related_model, field):
+    return Coalesce(
+        models.Subquery(
+            related_model.objects.filter(**{field: models.OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=models.Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def get_counter_mismatches():
+    for model, counter, related_model, field in COUNTERS:
+        for pk, found, wanted in (
+            model.objects.annotate(
+                actual=get_actual_count(related_model, field)
+            )
+            .exclude(**{counter: models.F('actual')})
+            .values_list('pk', counter, 'actual')
+        ):
+            yield model, counter, pk, found, wanted
+
+
+def update_counters():
+    for model, counter, related_model, field in COUNTERS:
+        model.objects.update(
+            **{counter: get_actual_count(related_model, field)}
+        )
+    bump_version('recipes')
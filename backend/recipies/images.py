@@ -0,0 +1,127 @@
+import io
+import os
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+IMAGE_SIZES = (
+    ('small', 160),
+    ('medium', 480),
+    ('full', 1200),
+)
+IMAGE_FORMATS = (
+    ('jpeg', 'JPEG', {'quality': 85, 'optimize': True}),
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+)
+ORIGINAL_FORMATS = {
+    'JPEG': ('jpg', {'quality': 90, 'optimize': True}),
+    'PNG': ('png', {'optimize': True}),
+    'WEBP': ('webp', {'quality': 90}),
+}
+DEFAULT_ORIGINAL_FORMAT = 'PNG'
+
+
+def is_image(file):
+    try:
+        with Image.open(file):
+            return True
+    except (OSError, Image.DecompressionBombError):
+        return False
+    finally:
+        file.seek(0)
+
+
+def encode_image(image, image_format, options):
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def process_image(data):
+    with Image.open(io.BytesIO(data)) as image:
+        image.verify()
+
+    with Image.open(io.BytesIO(data)) as image:
+        image_format = (
+            image.format
+            if image.format in ORIGINAL_FORMATS
+            else DEFAULT_ORIGINAL_FORMAT
+        )
+        image = ImageOps.exif_transpose(image)
+        image.info.pop('exif', None)
+        extension, options = ORIGINAL_FORMATS[image_format]
+        original = encode_image(image, image_format, options)
+
+        image = image.convert('RGB')
+        variants = {}
+        previous_size = 0
+        for size_name, size in IMAGE_SIZES:
+            # Небольшой исходник целиком помещается в предыдущий размер,
+            # и все следующие варианты повторили бы его.
+            if max(image.size) <= previous_size:
+                break
+
+            previous_size = size
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.LANCZOS)
+            variants[size_name] = {'width': resized.width}
+            for (
+                variant_extension,
+                variant_format,
+                variant_options,
+            ) in IMAGE_FORMATS:
+                variants[size_name][variant_extension] = encode_image(
+                    resized, variant_format, variant_options
+                )
+
+    return original, extension, variants
+
+
+def save_processed_image(image, original, extension, variants):
+    storage = image.storage
+    root = os.path.splitext(image.name)[0]
+    name = storage.save(f'{root}.{extension}', ContentFile(original))
+
+    root = os.path.splitext(name)[0]
+    saved_variants = {'source': name}
+    for size_name, variant in variants.items():
+        saved_variants[size_name] = {'width': variant['width']}
+        for extension, _, _ in IMAGE_FORMATS:
+            saved_variants[size_name][extension] = storage.save(
+                f'{root}_{size_name}.{extension}',
+                ContentFile(variant[extension]),
+            )
+
+    return name, saved_variants
+
+
+def get_variant_names(variants):
+    names = [variants.get('source')]
+    for size_name, _ in IMAGE_SIZES:
+        for extension, _, _ in IMAGE_FORMATS:
+            names.append(variants.get(size_name, {}).get(extension))
+
+    return [name for name in names if name]
+
+
+def get_image_srcset(image, variants, extension):
+    # Варианты относятся к прежнему изображению, пока обработчик не
+    # обработает новое.
+    if not image.name or variants.get('source') != image.name:
+        return None
+
+    widths = set()
+    srcset = []
+    for size_name, _ in IMAGE_SIZES:
+        variant = variants.get(size_name)
+        if variant is None or variant['width'] in widths:
+            continue
+
+        widths.add(variant['width'])
+        srcset.append(
+            f'{image.storage.url(variant[extension])} {variant["width"]}w'
+        )
+
+    return ', '.join(srcset)
@@ -0,0 +1,127 @@
+import base64
+import io
+import json
+import os
+import tracemalloc
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from PIL import Image
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.views import RecipeViewSet
+from ingredients.models import Ingredient
+from recipies.models import Recipe
+from tags.models import Tag
+from users.models import FoodGramUser
+
+IMAGE_SIZE = 5
+
+
+class RollbackError(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare peak memory of recipe creation with a base64 JSON image '
+        'and with a multipart image upload'
+    )
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=IMAGE_SIZE,
+            help='Uploaded image size in megabytes',
+        )
+
+    def handle(self, *args, **options):
+        image = self.get_image(options['size'] * 1024 * 1024)
+        results = {}
+        try:
+            with transaction.atomic():
+                user, fields = self.get_author()
+                results['base64 JSON'] = self.measure(
+                    user,
+                    fields,
+                    {
+                        'image': 'data:image/jpeg;base64,'
+                        + base64.b64encode(image).decode(),
+                    },
+                    'json',
+                )
+                results['multipart'] = self.measure(
+                    user,
+                    fields,
+                    {
+                        'image': SimpleUploadedFile(
+                            'bench.jpg', image, content_type='image/jpeg'
+                        ),
+                    },
+                    'multipart',
+                )
+                raise RollbackError
+        except RollbackError:
+            pass
+
+        for name, peak in results.items():
+            print(f'{name}: peak {peak / 1024 / 1024:.1f} MB')
+
+    @staticmethod
+    def get_image(size):
+        # Сервер проверяет только заголовок изображения, поэтому к
+        # маленькому JPEG дописываем случайные байты до нужного размера.
+        buffer = io.BytesIO()
+        Image.new('RGB', (16, 16)).save(buffer, 'JPEG')
+        image = buffer.getvalue()
+        return image + os.urandom(max(size - len(image), 0))
+
+    @staticmethod
+    def get_author():
+        user = FoodGramUser.objects.create(
+            username='bench-image-upload',
+            email='bench-image-upload@example.com',
+        )
+        tag = Tag.objects.create(
+            name='bench-image-upload',
+            color='#010203',
+            slug='bench-image-upload',
+        )
+        ingredient = Ingredient.objects.create(
+            name='bench-image-upload', measurement_unit='g'
+        )
+        fields = {
+            'name': 'bench',
+            'text': 'bench',
+            'cooking_time': 1,
+            'tags': [tag.id],
+            'ingredients': [{'id': ingredient.id, 'amount': 1}],
+        }
+        return user, fields
+
+    @staticmethod
+    def measure(user, fields, image_data, data_format):
+        data = {**fields, **image_data}
+        if data_format == 'multipart':
+            data['tags'] = json.dumps(data['tags'])
+            data['ingredients'] = json.dumps(data['ingredients'])
+
+        view = RecipeViewSet.as_view({'post': 'create'})
+        tracemalloc.start()
+        request = APIRequestFactory().post(
+            '/api/recipes/', data, format=data_format
+        )
+        force_authenticate(request, user)
+        response = view(request)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        # Без обработчика запросов Django загруженные файлы сами не
+        # закрываются.
+        for file in response.renderer_context['request'].FILES.values():
+            file.close()
+
+        recipe = Recipe.objects.get(pk=response.data['id'])
+        recipe.image.delete(save=False)
+        return peak
@@ -0,0 +1,67 @@
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+
+from recipies.images import get_variant_names
+from recipies.models import Recipe
+
+MIN_AGE = 3600
+
+
+class Command(BaseCommand):
+    help = 'Delete recipe image files not referenced by any recipe'
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=MIN_AGE,
+            help='Keep files modified less than this number of seconds ago',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report orphaned files',
+        )
+
+    def handle(self, *args, **options):
+        field = Recipe._meta.get_field('image')
+        storage = field.storage
+        directory = field.upload_to.rstrip('/')
+        threshold = timezone.now() - timedelta(seconds=options['min_age'])
+
+        referenced = set()
+        for image, variants in Recipe.objects.values_list(
+            'image', 'image_variants'
+        ).iterator():
+            referenced.add(image)
+            referenced.update(get_variant_names(variants))
+
+        deleted = 0
+        freed = 0
+        _, files = (
+            storage.listdir(directory)
+            if storage.exists(directory)
+            else ((), ())
+        )
+        for file_name in files:
+            name = os.path.join(directory, file_name)
+            if (
+                name in referenced
+                or storage.get_modified_time(name) > threshold
+            ):
+                continue
+
+            deleted += 1
+            freed += storage.size(name)
+            if not options['dry_run']:
+                storage.delete(name)
+
+        action = 'found' if options['dry_run'] else 'deleted'
+        print(
+            f'{deleted} orphaned recipe images {action}, '
+            f'{freed / 1024 / 1024:.1f} MB, '
+            f'{len(referenced)} images referenced'
+        )
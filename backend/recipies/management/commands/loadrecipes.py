@@ -0,0 +1,346 @@
+import csv
+import io
+import json
+import tempfile
+import time
+from collections import defaultdict
+from itertools import islice
+
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+    CommandParser,
+)
+from django.db import connection, transaction
+from django.utils import timezone
+
+from foodgram.cache import bump_version
+from foodgram.utils import iter_json_list, iter_ndjson
+from ingredients.models import Ingredient
+from recipies.counters import update_counters
+from recipies.models import (
+    Favorite,
+    IngredientAmount,
+    Recipe,
+    ShoppingCart,
+    ShoppingListItem,
+)
+from tags.models import Tag
+from users.models import FoodGramUser, Subscribe
+
+BATCH_SIZE = 5000
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+USER_FIELDS = (
+    'password',
+    'last_login',
+    'is_superuser',
+    'username',
+    'is_staff',
+    'is_active',
+    'date_joined',
+    'email',
+    'first_name',
+    'last_name',
+)
+MODELS_ORDER = (
+    'users.foodgramuser',
+    'tags.tag',
+    'ingredients.ingredient',
+    'recipies.recipe',
+    'recipies.ingredientamount',
+    'recipies.favorite',
+    'recipies.shoppingcart',
+    'users.subscribe',
+)
+
+
+def batches(records, size):
+    while batch := list(islice(records, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Load users, tags, ingredients, recipes, favorites, shopping carts '
+        'and subscriptions from a JSON or NDJSON dump'
+    )
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            'file', help='JSON or NDJSON dump file name', metavar='file-name'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Number of rows inserted with one query',
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Use COPY for ingredient amounts and recipe tags (Postgres)',
+        )
+
+    def handle(self, *args, **options):
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('COPY is supported only for PostgreSQL')
+
+        self.batch_size = options['batch_size']
+        self.use_copy = options['copy']
+        self.id_maps = defaultdict(dict)
+        self.counts = defaultdict(int)
+        loaders = {
+            'users.foodgramuser': self.load_users,
+            'tags.tag': self.load_tags,
+            'ingredients.ingredient': self.load_ingredients,
+            'recipies.recipe': self.load_recipes,
+            'recipies.ingredientamount': self.load_ingredient_amounts,
+            'recipies.favorite': self.load_favorites,
+            'recipies.shoppingcart': self.load_shopping_carts,
+            'users.subscribe': self.load_subscribes,
+        }
+
+        started = time.monotonic()
+        spools = self.spool(options['file'])
+        try:
+            with transaction.atomic():
+                for label in MODELS_ORDER:
+                    spool = spools[label]
+                    spool.seek(0)
+                    for batch in batches(
+                        (json.loads(line) for line in spool), self.batch_size
+                    ):
+                        loaders[label](batch)
+                        self.counts[label] += len(batch)
+
+                if self.counts['recipies.shoppingcart']:
+                    ShoppingListItem.objects.rebuild()
+                update_counters()
+        except KeyError as error:
+            raise CommandError(f'Unknown object reference: {error}')
+        finally:
+            for spool in spools.values():
+                spool.close()
+
+        bump_version('tags')
+        bump_version('ingredients')
+        elapsed = time.monotonic() - started
+        total = sum(self.counts.values())
+        for label in MODELS_ORDER:
+            print(f'{label}: {self.counts[label]}')
+        print(
+            f'The data from the "{options["file"]}" has been uploaded '
+            f'successfully: {total} rows, '
+            f'{total / elapsed if elapsed else total:.0f} rows/s'
+        )
+
+    def spool(self, file):
+        spools = {
+            label: tempfile.TemporaryFile('w+', encoding='utf-8')
+            for label in MODELS_ORDER
+        }
+        reader = (
+            iter_ndjson if file.endswith(NDJSON_EXTENSIONS) else iter_json_list
+        )
+        with open(file, 'r', encoding='utf-8') as data_file:
+            for record in reader(data_file):
+                spool = spools.get(record['model'])
+                if spool is not None:
+                    spool.write(json.dumps(record) + '\n')
+
+        return spools
+
+    def create(self, label, model, records_objects):
+        objects = model.objects.bulk_create(
+            [obj for _, obj in records_objects]
+        )
+        self.id_maps[label].update(
+            (record['pk'], obj.pk)
+            for (record, _), obj in zip(records_objects, objects)
+        )
+
+    def insert(self, model, objects, columns):
+        if not self.use_copy:
+            model.objects.bulk_create(objects)
+            return
+
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            [getattr(obj, column) for column in columns] for obj in objects
+        )
+        buffer.seek(0)
+        quote_name = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {quote_name(model._meta.db_table)} '
+                f'({", ".join(quote_name(column) for column in columns)}) '
+                f'FROM STDIN WITH (FORMAT csv)',
+                buffer,
+            )
+
+    def load_users(self, batch):
+        id_map = self.id_maps['users.foodgramuser']
+        existing = dict(
+            FoodGramUser.objects.filter(
+                username__in=[record['fields']['username'] for record in batch]
+            ).values_list('username', 'id')
+        )
+        new_users = []
+        for record in batch:
+            fields = record['fields']
+            if fields['username'] in existing:
+                id_map[record['pk']] = existing[fields['username']]
+                continue
+            new_users.append(
+                (
+                    record,
+                    FoodGramUser(
+                        **{
+                            field: fields[field]
+                            for field in USER_FIELDS
+                            if field in fields
+                        }
+                    ),
+                )
+            )
+        self.create('users.foodgramuser', FoodGramUser, new_users)
+
+    def load_tags(self, batch):
+        id_map = self.id_maps['tags.tag']
+        existing = dict(
+            Tag.objects.filter(
+                slug__in=[record['fields']['slug'] for record in batch]
+            ).values_list('slug', 'id')
+        )
+        new_tags = []
+        for record in batch:
+            fields = record['fields']
+            if fields['slug'] in existing:
+                id_map[record['pk']] = existing[fields['slug']]
+                continue
+            new_tags.append(
+                (
+                    record,
+                    Tag(
+                        name=fields['name'],
+                        color=fields['color'],
+                        slug=fields['slug'],
+                    ),
+                )
+            )
+        self.create('tags.tag', Tag, new_tags)
+
+    def load_ingredients(self, batch):
+        id_map = self.id_maps['ingredients.ingredient']
+        existing = {
+            (name, measurement_unit): ingredient_id
+            for ingredient_id, name, measurement_unit in (
+                Ingredient.objects.filter(
+                    name__in=[record['fields']['name'] for record in batch]
+                ).values_list('id', 'name', 'measurement_unit')
+            )
+        }
+        new_ingredients = {}
+        duplicates = []
+        for record in batch:
+            fields = record['fields']
+            key = (fields['name'], fields['measurement_unit'])
+            if key in existing:
+                id_map[record['pk']] = existing[key]
+            elif key in new_ingredients:
+                duplicates.append((record, key))
+            else:
+                new_ingredients[key] = (
+                    record,
+                    Ingredient(
+                        name=fields['name'],
+                        measurement_unit=fields['measurement_unit'],
+                    ),
+                )
+        self.create(
+            'ingredients.ingredient', Ingredient, new_ingredients.values()
+        )
+        for record, key in duplicates:
+            id_map[record['pk']] = new_ingredients[key][1].pk
+
+    def load_recipes(self, batch):
+        users = self.id_maps['users.foodgramuser']
+        tags = self.id_maps['tags.tag']
+        now = timezone.now()
+        new_recipes = [
+            (
+                record,
+                Recipe(
+                    author_id=users[record['fields']['author']],
+                    name=record['fields']['name'],
+                    text=record['fields']['text'],
+                    cooking_time=record['fields']['cooking_time'],
+                    image=record['fields']['image'],
+                    pub_date=record['fields'].get('pub_date') or now,
+                ),
+            )
+            for record in batch
+        ]
+        self.create('recipies.recipe', Recipe, new_recipes)
+
+        recipes = self.id_maps['recipies.recipe']
+        self.insert(
+            Recipe.tags.through,
+            [
+                Recipe.tags.through(
+                    recipe_id=recipes[record['pk']], tag_id=tags[tag_id]
+                )
+                for record in batch
+                for tag_id in record['fields'].get('tags', ())
+            ],
+            ('recipe_id', 'tag_id'),
+        )
+
+    def load_ingredient_amounts(self, batch):
+        recipes = self.id_maps['recipies.recipe']
+        ingredients = self.id_maps['ingredients.ingredient']
+        self.insert(
+            IngredientAmount,
+            [
+                IngredientAmount(
+                    recipe_id=recipes[record['fields']['recipe']],
+                    ingredient_id=ingredients[record['fields']['ingredient']],
+                    amount=record['fields']['amount'],
+                )
+                for record in batch
+            ],
+            ('recipe_id', 'ingredient_id', 'amount'),
+        )
+
+    def load_user_recipes(self, model, batch):
+        users = self.id_maps['users.foodgramuser']
+        recipes = self.id_maps['recipies.recipe']
+        model.objects.bulk_create(
+            [
+                model(
+                    user_id=users[record['fields']['user']],
+                    recipe_id=recipes[record['fields']['recipe']],
+                )
+                for record in batch
+            ],
+            ignore_conflicts=True,
+        )
+
+    def load_favorites(self, batch):
+        self.load_user_recipes(Favorite, batch)
+
+    def load_shopping_carts(self, batch):
+        self.load_user_recipes(ShoppingCart, batch)
+
+    def load_subscribes(self, batch):
+        users = self.id_maps['users.foodgramuser']
+        Subscribe.objects.bulk_create(
+            [
+                Subscribe(
+                    user_id=users[record['fields']['user']],
+                    author_id=users[record['fields']['author']],
+                )
+                for record in batch
+            ],
+            ignore_conflicts=True,
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandParser
+
+from recipies.models import ImageStatus, Recipe
+
+
+class Command(BaseCommand):
+    help = 'Queue recipe images without resized and WebP variants'
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Queue all recipe images, including processed ones',
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image_status=ImageStatus.PROCESSING)
+        if not options['force']:
+            recipes = recipes.exclude(image_status=ImageStatus.READY)
+
+        queued = recipes.update(image_status=ImageStatus.PENDING)
+        print(
+            f'{queued} recipe images have been queued, '
+            f'run "processimages" to process them'
+        )
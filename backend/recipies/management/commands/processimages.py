@@ -0,0 +1,153 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.utils import timezone
+
+from foodgram.cache import bump_version
+from recipies.images import (
+    get_variant_names,
+    process_image,
+    save_processed_image,
+)
+from recipies.models import ImageStatus, Recipe
+
+BATCH_SIZE = 20
+SLEEP_TIME = 2.0
+
+
+class Command(BaseCommand):
+    help = 'Verify, clean and resize queued recipe images'
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Number of image processing processes',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Number of images taken from the queue at once',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=SLEEP_TIME,
+            help='Seconds to wait when the queue is empty',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty',
+        )
+        parser.add_argument(
+            '--requeue',
+            action='store_true',
+            help='Return images left in processing by a stopped worker',
+        )
+
+    def handle(self, *args, **options):
+        if options['requeue']:
+            Recipe.objects.filter(image_status=ImageStatus.PROCESSING).update(
+                image_status=ImageStatus.PENDING
+            )
+
+        self.processed = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        with ProcessPoolExecutor(
+            max_workers=options['workers'],
+            mp_context=multiprocessing.get_context('spawn'),
+        ) as pool:
+            while True:
+                recipes = self.take_recipes(options['batch_size'])
+                if not recipes:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+
+                self.process_recipes(pool, recipes)
+                bump_version('recipes')
+                self.print_stats()
+
+    def take_recipes(self, batch_size):
+        with transaction.atomic():
+            recipes = list(
+                Recipe.objects.select_for_update(skip_locked=True)
+                .filter(image_status=ImageStatus.PENDING)
+                .only('id', 'image', 'image_variants')
+                .order_by('id')[:batch_size]
+            )
+            Recipe.objects.filter(
+                pk__in=[recipe.pk for recipe in recipes]
+            ).update(image_status=ImageStatus.PROCESSING)
+
+        return recipes
+
+    def process_recipes(self, pool, recipes):
+        futures = []
+        for recipe in recipes:
+            try:
+                with recipe.image.open('rb') as image_file:
+                    futures.append(
+                        pool.submit(process_image, image_file.read())
+                    )
+            except OSError:
+                futures.append(None)
+
+        for recipe, future in zip(recipes, futures):
+            try:
+                result = future.result() if future is not None else None
+            except Exception:
+                result = None
+
+            if result is None:
+                self.failed += 1
+                Recipe.objects.filter(
+                    pk=recipe.pk,
+                    image=recipe.image.name,
+                    image_status=ImageStatus.PROCESSING,
+                ).update(
+                    image_status=ImageStatus.FAILED,
+                    updated_at=timezone.now(),
+                )
+                continue
+
+            name, variants = save_processed_image(recipe.image, *result)
+            updated = Recipe.objects.filter(
+                pk=recipe.pk,
+                image=recipe.image.name,
+                image_status=ImageStatus.PROCESSING,
+            ).update(
+                image=name,
+                image_variants=variants,
+                image_status=ImageStatus.READY,
+                updated_at=timezone.now(),
+            )
+            if updated:
+                self.processed += 1
+                released = [
+                    recipe.image.name,
+                    *get_variant_names(recipe.image_variants),
+                ]
+            else:
+                released = get_variant_names(variants)
+            Recipe.objects.release_images(recipe.image.storage, released)
+
+    def print_stats(self):
+        elapsed = time.monotonic() - self.started
+        queued = Recipe.objects.filter(
+            image_status=ImageStatus.PENDING
+        ).count()
+        print(
+            f'Images processed: {self.processed}, failed: {self.failed}, '
+            f'{self.processed / elapsed if elapsed else 0:.1f} images/s, '
+            f'queue depth: {queued}'
+        )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandParser
+
+from recipies.models import ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify users shopping lists from shopping carts'
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare shopping lists with shopping carts',
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            ShoppingListItem.objects.rebuild()
+            print('Shopping lists have been rebuilt successfully')
+            return
+
+        expected = ShoppingListItem.objects.get_expected()
+        actual = {
+            (user_id, ingredient_id): amount
+            for user_id, ingredient_id, amount in (
+                ShoppingListItem.objects.values_list(
+                    'user_id', 'ingredient_id', 'amount'
+                )
+            )
+        }
+        mismatches = [
+            (key, actual.get(key), expected.get(key))
+            for key in actual.keys() | expected
+            if actual.get(key) != expected.get(key)
+        ]
+        for (user_id, ingredient_id), found, wanted in sorted(mismatches):
+            print(
+                f'user {user_id}, ingredient {ingredient_id}: '
+                f'{found} instead of {wanted}'
+            )
+        print(f'Shopping lists mismatches found: {len(mismatches)}')
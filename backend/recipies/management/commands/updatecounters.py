@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandParser
+
+from recipies.counters import get_counter_mismatches, update_counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalculate or verify favorites, shopping carts, recipes '
+        'and subscribers counters'
+    )
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare counters with the actual rows',
+        )
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            update_counters()
+            print('Counters have been updated successfully')
+            return
+
+        mismatches = 0
+        for model, counter, pk, found, wanted in get_counter_mismatches():
+            mismatches += 1
+            print(
+                f'{model._meta.label} {pk}, {counter}: '
+                f'{found} instead of {wanted}'
+            )
+        print(f'Counters mismatches found: {mismatches}')
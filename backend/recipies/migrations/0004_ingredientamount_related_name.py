@@ -0,0 +1,23 @@
+# Generated by Django 4.2.1 on 2026-10-18 01:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipies", "0003_alter_recipe_options_recipe_pub_date"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ingredientamount",
+            name="recipe",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="ingredient_amounts",
+                to="recipies.recipe",
+                verbose_name="Рецепт",
+            ),
+        ),
+    ]
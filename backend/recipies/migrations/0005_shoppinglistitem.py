@@ -0,0 +1,85 @@
+# Generated by Django 4.2.1 on 2026-10-18 01:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def fill_shopping_lists(apps, schema_editor):
+    IngredientAmount = apps.get_model("recipies", "IngredientAmount")
+    ShoppingListItem = apps.get_model("recipies", "ShoppingListItem")
+
+    ShoppingListItem.objects.bulk_create(
+        ShoppingListItem(
+            user_id=item["user_id"],
+            ingredient_id=item["ingredient_id"],
+            amount=item["total_amount"],
+        )
+        for item in IngredientAmount.objects.filter(
+            recipe__shopping_cart__isnull=False
+        )
+        .values("ingredient_id", user_id=F("recipe__shopping_cart__user"))
+        .annotate(total_amount=Sum("amount"))
+        .order_by()
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("ingredients", "0001_initial"),
+        ("recipies", "0004_ingredientamount_related_name"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShoppingListItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.PositiveIntegerField(verbose_name="Количество"),
+                ),
+                (
+                    "ingredient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shopping_list_items",
+                        to="ingredients.ingredient",
+                        verbose_name="Ингредиент",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shopping_list",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ингредиент списка покупок",
+                "verbose_name_plural": "Ингредиенты списка покупок",
+                "ordering": ["id"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="shoppinglistitem",
+            constraint=models.UniqueConstraint(
+                fields=("user", "ingredient"),
+                name="shopping_list_user_ingredient_unique",
+            ),
+        ),
+        migrations.RunPython(fill_shopping_lists, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.1 on 2026-10-18 01:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipies", "0007_recipe_image_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="image_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Ожидает обработки"),
+                    ("processing", "Обрабатывается"),
+                    ("ready", "Готово"),
+                    ("failed", "Ошибка обработки"),
+                ],
+                db_index=True,
+                default="pending",
+                editable=False,
+                max_length=10,
+                verbose_name="Состояние обработки фото",
+            ),
+        ),
+    ]
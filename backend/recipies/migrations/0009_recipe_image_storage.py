@@ -0,0 +1,23 @@
+# Generated by Django 4.2.1 on 2026-10-18 01:57
+
+from django.db import migrations, models
+
+import foodgram.storage
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipies", "0008_recipe_image_status"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="recipe",
+            name="image",
+            field=models.ImageField(
+                storage=foodgram.storage.ContentAddressedStorage(),
+                upload_to="recipies_img/",
+                verbose_name="Фото",
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.1 on 2026-10-18 02:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def get_actual_count(related_model, field):
+    return Coalesce(
+        Subquery(
+            related_model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model("recipies", "Recipe")
+    Favorite = apps.get_model("recipies", "Favorite")
+    ShoppingCart = apps.get_model("recipies", "ShoppingCart")
+
+    Recipe.objects.update(
+        favorites_count=get_actual_count(Favorite, "recipe"),
+        shopping_cart_count=get_actual_count(ShoppingCart, "recipe"),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipies", "0009_recipe_image_storage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="favorites_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="В избранном"
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="shopping_cart_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="В списках покупок"
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.1 on 2026-10-18 02:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipies", "0010_recipe_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="counters_updated_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Дата изменения счётчиков",
+            ),
+        ),
+    ]
@@ -1,11 +1,78 @@
+from contextvars import ContextVar
+
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
+from foodgram.cache import bump_version
+from foodgram.storage import ContentAddressedStorage
 from ingredients.models import Ingredient
+from recipies.images import IMAGE_FORMATS, IMAGE_SIZES, get_variant_names
 from tags.models import Tag
 from users.models import FoodGramUser
 
 
+def lock_users(user_ids):
+    # Блокируем пользователей, чтобы параллельные изменения корзины
+    # одного пользователя не теряли обновления друг друга.
+    list(
+        FoodGramUser.objects.select_for_update()
+        .filter(id__in=user_ids)
+        .values_list('id', flat=True)
+    )
+
+
+batch_delete = ContextVar('batch_delete', default=False)
+
+
+def delete_batch(queryset):
+    # Сигналы удаления при этом пропускают пересчёт счётчиков, версий и
+    # списка покупок: вызывающий код обновляет их сам одним запросом.
+    token = batch_delete.set(True)
+    try:
+        return queryset.delete()
+    finally:
+        batch_delete.reset(token)
+
+
+class ImageStatus(models.TextChoices):
+    PENDING = 'pending', 'Ожидает обработки'
+    PROCESSING = 'processing', 'Обрабатывается'
+    READY = 'ready', 'Готово'
+    FAILED = 'failed', 'Ошибка обработки'
+
+
+class RecipeManager(models.Manager):
+    @staticmethod
+    def get_image_lookups():
+        yield 'image'
+        yield 'image_variants__source'
+        for size_name, _ in IMAGE_SIZES:
+            for extension, _, _ in IMAGE_FORMATS:
+                yield f'image_variants__{size_name}__{extension}'
+
+    def get_referenced_images(self, names):
+        names = set(names)
+        query = models.Q()
+        for lookup in self.get_image_lookups():
+            query |= models.Q(**{f'{lookup}__in': names})
+
+        referenced = set()
+        for image, variants in self.filter(query).values_list(
+            'image', 'image_variants'
+        ):
+            referenced.add(image)
+            referenced.update(get_variant_names(variants))
+
+        return referenced & names
+
+    def release_images(self, storage, names):
+        names = {name for name in names if name}
+        for name in names - self.get_referenced_images(names):
+            storage.delete(name)
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         FoodGramUser,
@@ -42,10 +109,25 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         upload_to='recipies_img/',
+        storage=ContentAddressedStorage(),
         null=False,
         blank=False,
         verbose_name='Фото',
     )
+    image_status = models.CharField(
+        max_length=10,
+        choices=ImageStatus.choices,
+        default=ImageStatus.PENDING,
+        db_index=True,
+        editable=False,
+        verbose_name='Состояние обработки фото',
+    )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Варианты фото',
+    )
     tags = models.ManyToManyField(Tag, blank=False, related_name='recipies')
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -58,6 +140,27 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         help_text='Введите дату публикации.',
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном',
+    )
+    shopping_cart_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В списках покупок',
+    )
+    counters_updated_at = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        verbose_name='Дата изменения счётчиков',
+    )
+
+    objects = RecipeManager()
 
     class Meta:
         verbose_name = 'Рецепт'
@@ -72,6 +175,7 @@ class IngredientAmount(models.Model):
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
+        related_name='ingredient_amounts',
         verbose_name='Рецепт',
         blank=False,
         null=False,
@@ -105,6 +209,92 @@ class IngredientAmount(models.Model):
         )
 
 
+class UserRecipeManager(models.Manager):
+    counter_name = None
+
+    def add_recipes(self, user, recipe_ids):
+        with transaction.atomic():
+            lock_users((user.id,))
+            found = set(
+                Recipe.objects.filter(pk__in=recipe_ids).values_list(
+                    'pk', flat=True
+                )
+            )
+            added = found - set(
+                self.filter(user=user, recipe_id__in=found).values_list(
+                    'recipe_id', flat=True
+                )
+            )
+            if added:
+                self.bulk_create(
+                    [
+                        self.model(user=user, recipe_id=recipe_id)
+                        for recipe_id in added
+                    ],
+                    ignore_conflicts=True,
+                )
+                # bulk_create не отправляет сигналы, поэтому счётчики
+                # и версии кеша обновляем здесь.
+                self.update_counter(added)
+                bump_version(f'user:{user.id}')
+                self.recipes_added(user, added)
+
+        return found, added
+
+    def remove_recipes(self, user, recipe_ids):
+        with transaction.atomic():
+            lock_users((user.id,))
+            removed = set(
+                self.filter(user=user, recipe_id__in=recipe_ids).values_list(
+                    'recipe_id', flat=True
+                )
+            )
+            if removed:
+                self.recipes_removed(user, removed)
+                delete_batch(self.filter(user=user, recipe_id__in=removed))
+                self.update_counter(removed)
+                bump_version(f'user:{user.id}')
+
+        return removed
+
+    def update_counter(self, recipe_ids):
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            **{
+                self.counter_name: Coalesce(
+                    models.Subquery(
+                        self.filter(recipe=models.OuterRef('pk'))
+                        .order_by()
+                        .values('recipe')
+                        .annotate(total=models.Count('pk'))
+                        .values('total')
+                    ),
+                    0,
+                )
+            },
+            counters_updated_at=timezone.now(),
+        )
+
+    def recipes_added(self, user, recipe_ids):
+        pass
+
+    def recipes_removed(self, user, recipe_ids):
+        pass
+
+
+class FavoriteManager(UserRecipeManager):
+    counter_name = 'favorites_count'
+
+
+class ShoppingCartManager(UserRecipeManager):
+    counter_name = 'shopping_cart_count'
+
+    def recipes_added(self, user, recipe_ids):
+        ShoppingListItem.objects.add_recipes((user.id,), recipe_ids)
+
+    def recipes_removed(self, user, recipe_ids):
+        ShoppingListItem.objects.remove_recipes((user.id,), recipe_ids)
+
+
 class Favorite(models.Model):
     user = models.ForeignKey(
         FoodGramUser,
@@ -123,6 +313,8 @@ class Favorite(models.Model):
         help_text='Выберите рецепт',
     )
 
+    objects = FavoriteManager()
+
     class Meta:
         verbose_name = 'Избранный рецепт'
         verbose_name_plural = 'Избранные рецепты'
@@ -155,6 +347,8 @@ class ShoppingCart(models.Model):
         help_text='Выберите рецепт',
     )
 
+    objects = ShoppingCartManager()
+
     class Meta:
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Список покупок'
@@ -168,3 +362,141 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.user.username} - {self.recipe.name}'
+
+
+class ShoppingListManager(models.Manager):
+    @staticmethod
+    def get_recipe_amounts(recipe_ids):
+        return dict(
+            IngredientAmount.objects.filter(recipe_id__in=recipe_ids)
+            .values('ingredient_id')
+            .annotate(total_amount=models.Sum('amount'))
+            .values_list('ingredient_id', 'total_amount')
+        )
+
+    def change_amounts(self, user_ids, amounts):
+        amounts = {
+            ingredient_id: amount
+            for ingredient_id, amount in amounts.items()
+            if amount
+        }
+        if not amounts:
+            return
+
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+
+        with transaction.atomic():
+            lock_users(user_ids)
+            current = {
+                (item.user_id, item.ingredient_id): item
+                for item in self.filter(
+                    user_id__in=user_ids, ingredient_id__in=amounts
+                )
+            }
+
+            changed = []
+            deleted = []
+            for user_id in user_ids:
+                for ingredient_id, amount in amounts.items():
+                    item = current.get((user_id, ingredient_id))
+                    if item is None:
+                        item = self.model(
+                            user_id=user_id,
+                            ingredient_id=ingredient_id,
+                            amount=0,
+                        )
+                    item.amount += amount
+                    if item.amount > 0:
+                        changed.append(item)
+                    elif item.pk is not None:
+                        deleted.append(item.pk)
+
+            self.filter(pk__in=deleted).delete()
+            self.bulk_create(
+                changed,
+                update_conflicts=True,
+                unique_fields=('user', 'ingredient'),
+                update_fields=('amount',),
+            )
+
+    def add_recipes(self, user_ids, recipe_ids):
+        self.change_amounts(user_ids, self.get_recipe_amounts(recipe_ids))
+
+    def remove_recipes(self, user_ids, recipe_ids):
+        self.change_amounts(
+            user_ids,
+            {
+                ingredient_id: -amount
+                for ingredient_id, amount in self.get_recipe_amounts(
+                    recipe_ids
+                ).items()
+            },
+        )
+
+    @staticmethod
+    def get_expected():
+        return {
+            (item['user_id'], item['ingredient_id']): item['total_amount']
+            for item in IngredientAmount.objects.filter(
+                recipe__shopping_cart__isnull=False
+            )
+            .values(
+                'ingredient_id',
+                user_id=models.F('recipe__shopping_cart__user'),
+            )
+            .annotate(total_amount=models.Sum('amount'))
+            .order_by()
+        }
+
+    def rebuild(self):
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(
+                self.model(
+                    user_id=user_id,
+                    ingredient_id=ingredient_id,
+                    amount=amount,
+                )
+                for (user_id, ingredient_id), amount in (
+                    self.get_expected().items()
+                )
+            )
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        FoodGramUser,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент',
+    )
+    amount = models.PositiveIntegerField(
+        verbose_name='Количество',
+    )
+
+    objects = ShoppingListManager()
+
+    class Meta:
+        verbose_name = 'Ингредиент списка покупок'
+        verbose_name_plural = 'Ингредиенты списка покупок'
+        ordering = ['id']
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='shopping_list_user_ingredient_unique',
+            ),
+        )
+
+    def __str__(self):
+        return (
+            f'{self.user.username} - {self.ingredient.name} '
+            f'{self.amount} {self.ingredient.measurement_unit}'
+        )
@@ -0,0 +1,167 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from foodgram.cache import bump_version
+from recipies.counters import change_recipe_counter, change_user_counter
+from recipies.images import get_variant_names
+from recipies.models import (
+    Favorite,
+    ImageStatus,
+    IngredientAmount,
+    Recipe,
+    ShoppingCart,
+    ShoppingListItem,
+    batch_delete,
+)
+
+RECIPE_COUNTERS = {
+    Favorite: 'favorites_count',
+    ShoppingCart: 'shopping_cart_count',
+}
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=IngredientAmount)
+@receiver(post_delete, sender=IngredientAmount)
+def bump_recipes_version(sender, **kwargs):
+    bump_version('recipes')
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def bump_user_recipes_version(sender, instance, **kwargs):
+    if batch_delete.get():
+        return
+
+    bump_version(f'user:{instance.user_id}')
+
+
+@receiver(post_save, sender=Recipe)
+def queue_image_processing(sender, instance, **kwargs):
+    if (
+        instance.image_variants.get('source') == instance.image.name
+        or instance.image_status == ImageStatus.PENDING
+    ):
+        return
+
+    instance.image_status = ImageStatus.PENDING
+    Recipe.objects.filter(pk=instance.pk).update(
+        image_status=ImageStatus.PENDING
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def release_recipe_images(sender, instance, **kwargs):
+    names = [instance.image.name, *get_variant_names(instance.image_variants)]
+    transaction.on_commit(
+        lambda: Recipe.objects.release_images(instance.image.storage, names)
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def increase_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        change_user_counter((instance.author_id,), 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrease_recipes_count(sender, instance, **kwargs):
+    change_user_counter((instance.author_id,), 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def increase_recipe_counter(sender, instance, created, **kwargs):
+    if created:
+        change_recipe_counter(
+            (instance.recipe_id,), RECIPE_COUNTERS[sender], 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def decrease_recipe_counter(sender, instance, **kwargs):
+    if batch_delete.get():
+        return
+
+    change_recipe_counter((instance.recipe_id,), RECIPE_COUNTERS[sender], -1)
+
+
+def is_deleted_directly(model, origin):
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+
+    return isinstance(origin, model)
+
+
+def change_shopping_lists(recipe_id, ingredient_id, amount):
+    ShoppingListItem.objects.change_amounts(
+        ShoppingCart.objects.filter(recipe_id=recipe_id).values_list(
+            'user_id', flat=True
+        ),
+        {ingredient_id: amount},
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    if created:
+        ShoppingListItem.objects.add_recipes(
+            (instance.user_id,), (instance.recipe_id,)
+        )
+
+
+# pre_delete: при каскадном удалении рецепта или автора ингредиенты
+# рецепта ещё на месте, поэтому их можно вычесть из списка покупок.
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    if batch_delete.get():
+        return
+
+    ShoppingListItem.objects.remove_recipes(
+        (instance.user_id,), (instance.recipe_id,)
+    )
+
+
+@receiver(pre_save, sender=IngredientAmount)
+def remove_old_ingredient_amount(sender, instance, raw, **kwargs):
+    if raw or instance.pk is None:
+        return
+
+    old = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list('recipe_id', 'ingredient_id', 'amount')
+        .first()
+    )
+    if old is not None:
+        recipe_id, ingredient_id, amount = old
+        change_shopping_lists(recipe_id, ingredient_id, -amount)
+
+
+@receiver(post_save, sender=IngredientAmount)
+def add_new_ingredient_amount(sender, instance, raw, **kwargs):
+    if not raw:
+        change_shopping_lists(
+            instance.recipe_id, instance.ingredient_id, instance.amount
+        )
+
+
+# Ингредиенты, удалённые вместе с рецептом, уже вычтены через
+# ShoppingCart, а при удалении ингредиента или пользователя строки
+# списка покупок удаляются каскадом.
+@receiver(pre_delete, sender=IngredientAmount)
+def remove_ingredient_amount(sender, instance, origin, **kwargs):
+    if not batch_delete.get() and is_deleted_directly(sender, origin):
+        change_shopping_lists(
+            instance.recipe_id, instance.ingredient_id, -instance.amount
+        )
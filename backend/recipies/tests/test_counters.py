@@ -0,0 +1,102 @@
+from django.test import TestCase, override_settings
+
+from recipies.counters import get_counter_mismatches
+from recipies.models import Favorite, Recipe, ShoppingCart
+from users.models import FoodGramUser, Subscribe
+
+
+@override_settings(
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    }
+)
+class CountersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = FoodGramUser.objects.create(
+            username='author', email='author@example.com'
+        )
+        cls.user = FoodGramUser.objects.create(
+            username='user', email='user@example.com'
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.author,
+                name=f'recipe{number}',
+                text='text',
+                cooking_time=1,
+                image='recipies_img/recipe.jpg',
+            )
+            for number in range(3)
+        ]
+
+    def assert_counters(self, model, pk, **counters):
+        self.assertEqual(
+            model.objects.filter(pk=pk).values(*counters).get(), counters
+        )
+        self.assertEqual(list(get_counter_mismatches()), [])
+
+    def test_recipes_count(self):
+        self.assert_counters(FoodGramUser, self.author.pk, recipes_count=3)
+
+        self.recipes[0].delete()
+
+        self.assert_counters(FoodGramUser, self.author.pk, recipes_count=2)
+
+    def test_favorite_and_shopping_cart(self):
+        recipe = self.recipes[0]
+        favorite = Favorite.objects.create(user=self.user, recipe=recipe)
+        ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        ShoppingCart.objects.create(user=self.author, recipe=recipe)
+        self.assert_counters(
+            Recipe, recipe.pk, favorites_count=1, shopping_cart_count=2
+        )
+
+        favorite.delete()
+        self.user.shopping_cart.filter(recipe=recipe).delete()
+
+        self.assert_counters(
+            Recipe, recipe.pk, favorites_count=0, shopping_cart_count=1
+        )
+
+    def test_bulk_add_and_remove(self):
+        recipe_ids = [recipe.pk for recipe in self.recipes]
+        for manager in (Favorite.objects, ShoppingCart.objects):
+            manager.add_recipes(self.user, recipe_ids)
+            manager.add_recipes(self.author, recipe_ids[:1])
+        self.assert_counters(
+            Recipe, recipe_ids[0], favorites_count=2, shopping_cart_count=2
+        )
+
+        for manager in (Favorite.objects, ShoppingCart.objects):
+            manager.remove_recipes(self.user, recipe_ids)
+
+        self.assert_counters(
+            Recipe, recipe_ids[0], favorites_count=1, shopping_cart_count=1
+        )
+        self.assert_counters(
+            Recipe, recipe_ids[1], favorites_count=0, shopping_cart_count=0
+        )
+
+    def test_subscribers_count(self):
+        subscribe = Subscribe.objects.create(
+            user=self.user, author=self.author
+        )
+        self.assert_counters(FoodGramUser, self.author.pk, subscribers_count=1)
+
+        subscribe.delete()
+
+        self.assert_counters(FoodGramUser, self.author.pk, subscribers_count=0)
+
+    def test_user_deletion_cascade(self):
+        recipe = self.recipes[0]
+        Favorite.objects.create(user=self.user, recipe=recipe)
+        ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        Subscribe.objects.create(user=self.user, author=self.author)
+
+        self.user.delete()
+
+        self.assert_counters(
+            Recipe, recipe.pk, favorites_count=0, shopping_cart_count=0
+        )
+        self.assert_counters(FoodGramUser, self.author.pk, subscribers_count=0)
@@ -0,0 +1,48 @@
+import io
+
+from django.test import SimpleTestCase
+from PIL import Image
+
+from recipies.images import get_image_srcset, process_image
+from recipies.models import Recipe
+
+
+def get_png(width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ImagesTest(SimpleTestCase):
+    def test_small_source_has_no_duplicate_variants(self):
+        _, extension, variants = process_image(get_png(300, 200))
+
+        self.assertEqual(extension, 'png')
+        self.assertEqual(
+            {name: variant['width'] for name, variant in variants.items()},
+            {'small': 160, 'medium': 300},
+        )
+
+    def test_srcset_skips_duplicate_widths(self):
+        recipe = Recipe(image='recipies_img/photo.png')
+        variants = {
+            'source': 'recipies_img/photo.png',
+            'small': {'width': 160, 'jpeg': 'recipies_img/photo_small.jpg'},
+            'medium': {'width': 300, 'jpeg': 'recipies_img/photo_medium.jpg'},
+            'full': {'width': 300, 'jpeg': 'recipies_img/photo_medium.jpg'},
+        }
+
+        self.assertEqual(
+            get_image_srcset(recipe.image, variants, 'jpeg'),
+            '/media/recipies_img/photo_small.jpg 160w, '
+            '/media/recipies_img/photo_medium.jpg 300w',
+        )
+
+    def test_srcset_of_replaced_image_is_hidden(self):
+        recipe = Recipe(image='recipies_img/new.png')
+        variants = {
+            'source': 'recipies_img/old.png',
+            'small': {'width': 160, 'jpeg': 'recipies_img/old_small.jpg'},
+        }
+
+        self.assertIsNone(get_image_srcset(recipe.image, variants, 'jpeg'))
@@ -0,0 +1,172 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ingredients.models import Ingredient
+from recipies.models import (
+    IngredientAmount,
+    Recipe,
+    ShoppingCart,
+    ShoppingListItem,
+)
+from tags.models import Tag
+from users.models import FoodGramUser
+
+
+@override_settings(
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    }
+)
+class ShoppingListTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = FoodGramUser.objects.create(
+            username='author', email='author@example.com'
+        )
+        cls.user = FoodGramUser.objects.create(
+            username='user', email='user@example.com'
+        )
+        cls.tag = Tag.objects.create(name='tag', color='#000000', slug='tag')
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'ingredient{number}', measurement_unit='g'
+            )
+            for number in range(4)
+        ]
+        cls.recipes = []
+        for number in range(2):
+            recipe = Recipe.objects.create(
+                author=cls.author,
+                name=f'recipe{number}',
+                text='text',
+                cooking_time=1,
+                image='recipies_img/recipe.jpg',
+            )
+            IngredientAmount.objects.bulk_create(
+                IngredientAmount(
+                    recipe=recipe, ingredient=ingredient, amount=10
+                )
+                for ingredient in (
+                    cls.ingredients[number],
+                    cls.ingredients[number + 1],
+                )
+            )
+            cls.recipes.append(recipe)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_shopping_list(self, expected):
+        actual = {
+            (item.user_id, item.ingredient_id): item.amount
+            for item in ShoppingListItem.objects.all()
+        }
+        self.assertEqual(actual, ShoppingListItem.objects.get_expected())
+        self.assertEqual(
+            {
+                ingredient_id: amount
+                for (user_id, ingredient_id), amount in actual.items()
+                if user_id == self.user.id
+            },
+            {
+                self.ingredients[number].id: amount
+                for number, amount in expected.items()
+            },
+        )
+
+    def add_to_cart(self):
+        for recipe in self.recipes:
+            response = self.client.post(
+                f'/api/recipes/{recipe.id}/shopping_cart/'
+            )
+            self.assertEqual(response.status_code, 201)
+
+    def test_add_and_remove(self):
+        self.add_to_cart()
+        self.assert_shopping_list({0: 10, 1: 20, 2: 10})
+
+        response = self.client.delete(
+            f'/api/recipes/{self.recipes[0].id}/shopping_cart/'
+        )
+
+        self.assertEqual(response.status_code, 204)
+        self.assert_shopping_list({1: 10, 2: 10})
+
+    def test_bulk_add_and_remove(self):
+        ids = [recipe.id for recipe in self.recipes]
+        response = self.client.post(
+            '/api/recipes/shopping_cart/bulk/', {'recipes': ids}, 'json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_shopping_list({0: 10, 1: 20, 2: 10})
+
+        response = self.client.delete(
+            '/api/recipes/shopping_cart/bulk/', {'recipes': ids[:1]}, 'json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assert_shopping_list({1: 10, 2: 10})
+
+    def test_bulk_duplicates_rejected(self):
+        recipe_id = self.recipes[0].id
+        response = self.client.post(
+            '/api/recipes/shopping_cart/bulk/',
+            {'recipes': [recipe_id, recipe_id]},
+            'json',
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assert_shopping_list({})
+
+    def test_recipe_update(self):
+        self.add_to_cart()
+        ShoppingCart.objects.create(user=self.author, recipe=self.recipes[0])
+        self.client.force_authenticate(self.author)
+
+        response = self.client.patch(
+            f'/api/recipes/{self.recipes[0].id}/',
+            {
+                'ingredients': [
+                    {'id': self.ingredients[1].id, 'amount': 5},
+                    {'id': self.ingredients[3].id, 'amount': 7},
+                ],
+                'tags': [self.tag.id],
+            },
+            'json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assert_shopping_list({1: 15, 2: 10, 3: 7})
+
+    def test_ingredient_amount_save_and_delete(self):
+        self.add_to_cart()
+        ingredient_amount = self.recipes[0].ingredient_amounts.get(
+            ingredient=self.ingredients[0]
+        )
+
+        ingredient_amount.amount = 4
+        ingredient_amount.save()
+        self.assert_shopping_list({0: 4, 1: 20, 2: 10})
+
+        ingredient_amount.delete()
+        self.assert_shopping_list({1: 20, 2: 10})
+
+        IngredientAmount.objects.create(
+            recipe=self.recipes[0], ingredient=self.ingredients[3], amount=3
+        )
+        self.assert_shopping_list({1: 20, 2: 10, 3: 3})
+
+    def test_recipe_delete(self):
+        self.add_to_cart()
+
+        self.recipes[1].delete()
+
+        self.assert_shopping_list({0: 10, 1: 10})
+
+    def test_author_delete(self):
+        self.add_to_cart()
+
+        self.author.delete()
+
+        self.assert_shopping_list({})
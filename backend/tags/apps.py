@@ -5,3 +5,6 @@ class TagsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tags'
     verbose_name = 'FOODGRAM. Тэги'
+
+    def ready(self):
+        import tags.signals  # noqa: F401
@@ -5,3 +5,6 @@ class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
     verbose_name = 'FOODGRAM. Пользователи'
+
+    def ready(self):
+        import users.signals  # noqa: F401
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.1 on 2026-10-18 02:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def get_actual_count(related_model, field):
+    return Coalesce(
+        Subquery(
+            related_model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    FoodGramUser = apps.get_model("users", "FoodGramUser")
+    Recipe = apps.get_model("recipies", "Recipe")
+    Subscribe = apps.get_model("users", "Subscribe")
+
+    FoodGramUser.objects.update(
+        recipes_count=get_actual_count(Recipe, "author"),
+        subscribers_count=get_actual_count(Subscribe, "author"),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0001_initial"),
+        ("recipies", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="foodgramuser",
+            name="recipes_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Количество рецептов"
+            ),
+        ),
+        migrations.AddField(
+            model_name="foodgramuser",
+            name="subscribers_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                verbose_name="Количество подписчиков",
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
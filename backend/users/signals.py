@@ -0,0 +1,54 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from foodgram.cache import bump_version
+from users.models import FoodGramUser, Subscribe
+
+RENDERED_USER_FIELDS = frozenset(
+    ('username', 'email', 'first_name', 'last_name')
+)
+
+
+@receiver(post_save, sender=FoodGramUser)
+@receiver(post_delete, sender=FoodGramUser)
+def bump_users_version(sender, update_fields=None, **kwargs):
+    # Вход в систему и смена пароля сохраняют только last_login или
+    # password, которые не попадают в ответы API.
+    if update_fields is None or not RENDERED_USER_FIELDS.isdisjoint(
+        update_fields
+    ):
+        bump_version('users')
+
+
+@receiver(post_save, sender=FoodGramUser)
+@receiver(post_delete, sender=FoodGramUser)
+def bump_user_auth_version(sender, instance, **kwargs):
+    bump_version(f'auth:{instance.id}')
+
+
+@receiver(post_delete, sender=Token)
+def bump_token_auth_version(sender, instance, **kwargs):
+    bump_version(f'auth:{instance.user_id}')
+
+
+@receiver(post_save, sender=Subscribe)
+@receiver(post_delete, sender=Subscribe)
+def bump_user_subscriptions_version(sender, instance, **kwargs):
+    bump_version(f'user:{instance.user_id}')
+
+
+@receiver(post_save, sender=Subscribe)
+def increase_subscribers_count(sender, instance, created, **kwargs):
+    if created:
+        FoodGramUser.objects.filter(pk=instance.author_id).update(
+            subscribers_count=F('subscribers_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Subscribe)
+def decrease_subscribers_count(sender, instance, **kwargs):
+    FoodGramUser.objects.filter(pk=instance.author_id).update(
+        subscribers_count=F('subscribers_count') - 1
+    )